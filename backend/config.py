@@ -1,5 +1,8 @@
+import logging
 import os
+import sqlite3
 from dotenv import load_dotenv
+import google.generativeai as genai
 
 # Load environment variables from a .env file at the project root
 load_dotenv()
@@ -11,5 +14,51 @@ BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
 FINANCIAL_LITERACY_DB_PATH = os.path.join(BACKEND_DIR, 'financial_literacy.db')
 USER_SESSIONS_DB_PATH = os.path.join(BACKEND_DIR, 'user_sessions.db')
 
+# SQLAlchemy URLs for the same files, built once so every engine agrees on them
+FINANCIAL_LITERACY_DB_URL = "sqlite:///" + FINANCIAL_LITERACY_DB_PATH
+USER_SESSIONS_DB_URL = "sqlite:///" + USER_SESSIONS_DB_PATH
+
 # Get the Google API Key from the environment
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+
+# Configure the Gemini client once per process; every agent imports config
+if GOOGLE_API_KEY:
+    genai.configure(api_key=GOOGLE_API_KEY)
+
+# Log level for the agent servers (DEBUG shows per-request diagnostics)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Fill the content agent's lesson caches at import so first requests are cache hits
+# (WARM_CACHE=0 skips it, e.g. for quick one-off scripts)
+WARM_CACHE = os.getenv("WARM_CACHE", "1") == "1"
+
+# Per-connection SQLite settings for the session store and the shared database
+# service: WAL lets readers run alongside a writer, and busy_timeout waits on a
+# held lock instead of failing.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA busy_timeout=5000",
+)
+
+
+def _bootstrap_sqlite(path):
+    """Switch a database file to WAL mode for every process that opens it"""
+    # journal_mode is stored in the file itself, so one connection is enough;
+    # synchronous and busy_timeout are per-connection and set by each pool.
+    con = sqlite3.connect(path)
+    try:
+        con.execute("PRAGMA journal_mode=WAL")
+    finally:
+        con.close()
+
+
+def init_server():
+    """Set up logging and the database files; called by each agent server at startup"""
+    # Kept out of import time so scripts that only import config leave root logging
+    # and the database files alone
+    logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    for db_path in (FINANCIAL_LITERACY_DB_PATH, USER_SESSIONS_DB_PATH):
+        _bootstrap_sqlite(db_path)
@@ -1,359 +1,590 @@
-import sys
-import os
-from typing import Dict, Any, List
-import json
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 
-# Add the parent 'backend' directory to the Python path to find the 'shared' module
-_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-_BACKEND_DIR = os.path.abspath(os.path.join(_SCRIPT_DIR, '..', '..'))
-sys.path.append(_BACKEND_DIR)
+from cachetools import TTLCache
+from google.adk.tools import ToolContext
 
+from config import WARM_CACHE
 from shared.db_service import db
+from shared.json_utils import dumps
 
 
-def get_module_content(user_id: str, module_number: int) -> str:
-    """Retrieves and serves the complete learning content for a specific module."""
+# Envelope for a tool's unexpected-error reply; only the JSON-encoded message varies
+_ERROR_TEMPLATE = '{"status": "error", "message": %s, "data": null}'
+
+
+def _error_json(context: str, error: Exception) -> str:
+    """Returns the error reply for an exception raised while handling a tool call"""
+    return _ERROR_TEMPLATE % dumps(f"{context}: {error}")
+
+
+_TOPIC_DISPLAY = {
+    "investment_basics": "Investment Basics",
+    "risk_management": "Risk Management",
+    "retirement_planning": "Retirement Planning",
+    "budgeting": "Budgeting",
+    "financial_goals": "Financial Goals"
+}
+_DIFFICULTY_DISPLAY = {
+    "beginner": "Beginner",
+    "intermediate": "Intermediate",
+    "advanced": "Advanced"
+}
+
+
+def _topic_display(topic: str) -> str:
+    """Returns the title-cased display name for a topic id"""
+    display = _TOPIC_DISPLAY.get(topic)
+    return display if display is not None else topic.replace('_', ' ').title()
+
+
+def _difficulty_display(difficulty: str) -> str:
+    """Returns the title-cased display name for a difficulty level"""
+    display = _DIFFICULTY_DISPLAY.get(difficulty)
+    return display if display is not None else _title(difficulty)
+
+
+@lru_cache(maxsize=64)
+def _title(value: str) -> str:
+    """Returns value.title(), cached since learning styles and risk levels come from a handful of values"""
+    return value.title()
+
+
+# Rendered tool responses keyed by (learning path id, kind, module[, step]). A response only
+# depends on the learning path it was built from, and a new path gets a new id, so entries
+# never go stale; the TTL and size bound just cap memory.
+_RESPONSE_CACHE = TTLCache(maxsize=10_000, ttl=300)
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+
+def _cached_response(learning_path: Optional[Dict[str, Any]], key: tuple, build) -> str:
+    """Returns the cached response for key under this learning path, building it on a miss"""
+    # A build that raises stores nothing, so callers catch outside this call and a
+    # transient failure is retried on the next request instead of being cached
+    if learning_path is None or learning_path.get("id") is None:
+        return build()
+    
+    cache_key = (learning_path["id"],) + key
+    with _RESPONSE_CACHE_LOCK:
+        response = _RESPONSE_CACHE.get(cache_key)
+    if response is None:
+        response = build()
+        with _RESPONSE_CACHE_LOCK:
+            _RESPONSE_CACHE[cache_key] = response
+    return response
+
+
+class ModuleCtx(NamedTuple):
+    """The fields of one learning-path module that the content responses are built from"""
+    module_number: int
+    topic: str
+    difficulty: str
+    learning_style: str
+    risk_tolerance: str
+    title: str
+    duration: str
+    risk_focus: str
+
+
+def _module_ctx(path_data: Dict[str, Any], module: Dict[str, Any], module_number: int) -> ModuleCtx:
+    """Reads a module's fields, with their defaults, once for every response built from it"""
+    module_get = module.get
+    return ModuleCtx(
+        module_number=module_number,
+        topic=module_get("topic", "unknown"),
+        difficulty=module_get("difficulty", "beginner"),
+        learning_style=module_get("learning_style", "analytical"),
+        risk_tolerance=path_data.get("risk_tolerance", "moderate"),
+        title=module_get("title", "Unknown"),
+        duration=module_get("duration", "2-3 hours"),
+        risk_focus=module_get("risk_focus", "Balanced approach")
+    )
+
+
+# Error replies built once: the no-learning-path reply is fixed, and the range errors only
+# differ by a number
+_NO_LEARNING_PATH_JSON = dumps({
+    "status": "error",
+    "message": "ASSESSMENT_INCOMPLETE",
+    "data": None
+})
+_INVALID_MODULE_RANGE_TEMPLATE = '{"status":"error","message":"Invalid module number. Available modules: 1-%d","data":null}'
+_INVALID_STEP_RANGE_TEMPLATE = '{"status":"error","message":"Invalid step number. Available steps: 1-%d","data":null}'
+
+
+def _resolve_ctx(learning_path: Optional[Dict[str, Any]], module_number: int) -> Tuple[Optional[ModuleCtx], Optional[str]]:
+    """Returns (ctx, None) for the requested module of a learning path, or (None, error JSON) to send instead"""
+    if learning_path is None:
+        return None, _NO_LEARNING_PATH_JSON
+    
+    path_data = learning_path["path_data"]
+    modules = path_data.get("modules") or ()
+    total_modules = len(modules)
+    
+    if not 1 <= module_number <= total_modules:
+        return None, _INVALID_MODULE_RANGE_TEMPLATE % total_modules
+    
+    return _module_ctx(path_data, modules[module_number - 1], module_number), None
+
+
+def _serve_module(learning_path: Optional[Dict[str, Any]], key: tuple, module_number: int,
+                  render: Callable[[ModuleCtx], str], context: str) -> str:
+    """Serves a response about one module: from the cache, or by resolving the module and rendering it"""
+    def build() -> str:
+        ctx, error = _resolve_ctx(learning_path, module_number)
+        if error is not None:
+            return error
+        return render(ctx)
+    
     try:
-        learning_path = db.get_user_learning_path(user_id)
-        if not learning_path:
-            return json.dumps({
-                "status": "error",
-                "message": "ASSESSMENT_INCOMPLETE",
-                "data": None
-            })
-        
-        modules = learning_path["path_data"].get("modules", [])
-        
-        if module_number < 1 or module_number > len(modules):
-            return json.dumps({
-                "status": "error",
-                "message": f"Invalid module number. Available modules: 1-{len(modules)}",
-                "data": None
-            })
-        
-        module = modules[module_number - 1]
-        topic = module.get("topic", "unknown")
-        difficulty = module.get("difficulty", "beginner")
-        learning_style = module.get("learning_style", "analytical")
-        risk_tolerance = learning_path["path_data"].get("risk_tolerance", "moderate")
-        
-        content = generate_content_for_topic(topic, difficulty, learning_style, risk_tolerance)
-        
-        response_data = {
-            "status": "success",
-            "data": {
-                "module_number": module_number,
-                "title": module.get('title', 'Unknown'),
-                "topic": topic.replace('_', ' ').title(),
-                "difficulty": difficulty.title(),
-                "learning_style": learning_style.title(),
-                "risk_tolerance": risk_tolerance.title(),
-                "risk_focus": module.get('risk_focus', 'Balanced approach'),
-                "content": content,
-                "duration": module.get('duration', '2-3 hours'),
-                "description": f"This module covers essential concepts in {topic.replace('_', ' ')} designed for {difficulty} level learners with {learning_style} learning preferences."
-            }
-        }
-        
-        return json.dumps(response_data)
-        
+        return _cached_response(learning_path, key, build)
     except Exception as e:
-        return json.dumps({
+        return _error_json(context, e)
+
+
+# Replies for module and step numbers that can be rejected without looking up the learning path
+_INVALID_MODULE_NUMBER_JSON = dumps({
+    "status": "error",
+    "message": "Invalid module number. Module numbers start at 1.",
+    "data": None
+})
+_INVALID_STEP_NUMBER_JSON = dumps({
+    "status": "error",
+    "message": "Invalid step number. Step numbers start at 1.",
+    "data": None
+})
+
+
+def _check_numbers(module_number: int, step_number: int = 1) -> Optional[str]:
+    """Returns the error response for a module or step number that can never be valid, or None"""
+    if not isinstance(module_number, int) or module_number < 1:
+        return _INVALID_MODULE_NUMBER_JSON
+    if not isinstance(step_number, int) or step_number < 1:
+        return _INVALID_STEP_NUMBER_JSON
+    return None
+
+
+# Formats get_module_content can return the lesson body in: rendered HTML, or its structured parts
+_CONTENT_FORMATS = ("html", "data")
+
+
+def get_module_content(user_id: str, module_number: int, content_format: str = "html") -> str:
+    """Retrieves and serves the complete learning content for a specific module.
+    
+    content_format is "html" (default) for the rendered lesson, or "data" for its structured parts.
+    """
+    error = _check_numbers(module_number)
+    if error is not None:
+        return error
+    if content_format not in _CONTENT_FORMATS:
+        return dumps({
             "status": "error",
-            "message": f"Error retrieving module content: {str(e)}",
+            "message": f"Invalid content format: {content_format}. Use 'html' or 'data'",
             "data": None
         })
+    return _get_module_content_from_path(db.get_cached_learning_path(user_id), module_number, content_format)
 
-def get_lesson_step(user_id: str, module_number: int, step_number: int) -> str:
-    """Retrieves a specific step within a learning module for progressive content delivery."""
+def _get_module_content_from_path(learning_path: Optional[Dict[str, Any]], module_number: int, content_format: str = "html") -> str:
+    """Serves the module content response for an already loaded learning path"""
+    return _serve_module(
+        learning_path, ("module", module_number, content_format), module_number,
+        lambda ctx: _render_module_content(ctx, content_format), "Error retrieving module content"
+    )
+
+def _render_module_content(ctx: ModuleCtx, content_format: str) -> str:
+    """Renders the module content response"""
+    return dumps({
+        "status": "success",
+        "data": _module_content_data(ctx, content_format)
+    })
+
+def get_module_content_html(user_id: str, module_number: int) -> Tuple[Optional[ModuleCtx], str]:
+    """Returns (ctx, lesson HTML) for a module, or (None, error JSON) when it cannot be served"""
+    # Not an agent tool: backs the /module-content route, which sends the HTML as the
+    # response body so it is never escaped into a JSON string
+    error = _check_numbers(module_number)
+    if error is not None:
+        return None, error
+    
+    ctx, error = _resolve_ctx(db.get_cached_learning_path(user_id), module_number)
+    if error is not None:
+        return None, error
+    
+    return ctx, generate_content_for_topic(ctx.topic, ctx.difficulty, ctx.learning_style, ctx.risk_tolerance)
+
+def _module_content_data(ctx: ModuleCtx, content_format: str = "html") -> Dict[str, Any]:
+    """Assembles the content payload for one module of a learning path"""
+    topic, difficulty, learning_style = ctx.topic, ctx.difficulty, ctx.learning_style
+    
+    if content_format == "data":
+        content = get_content_data(topic, difficulty, learning_style, ctx.risk_tolerance)
+    else:
+        content = generate_content_for_topic(topic, difficulty, learning_style, ctx.risk_tolerance)
+    
+    return {
+        "module_number": ctx.module_number,
+        "title": ctx.title,
+        "topic": _topic_display(topic),
+        "difficulty": _difficulty_display(difficulty),
+        "learning_style": _title(learning_style),
+        "risk_tolerance": _title(ctx.risk_tolerance),
+        "risk_focus": ctx.risk_focus,
+        "content": content,
+        "duration": ctx.duration,
+        "description": f"This module covers essential concepts in {topic.replace('_', ' ')} designed for {difficulty} level learners with {learning_style} learning preferences."
+    }
+
+def get_all_module_contents(user_id: str) -> str:
+    """Retrieves the learning content for every module in the user's learning path in one call."""
+    return _get_all_module_contents_from_path(db.get_cached_learning_path(user_id))
+
+def _get_all_module_contents_from_path(learning_path: Optional[Dict[str, Any]]) -> str:
+    """Serves the all-modules response for an already loaded learning path"""
     try:
-        learning_path = db.get_user_learning_path(user_id)
-        if not learning_path:
-            return json.dumps({
-                "status": "error",
-                "message": "ASSESSMENT_INCOMPLETE", 
-                "data": None
-            })
-        
-        modules = learning_path["path_data"].get("modules", [])
-        
-        if module_number < 1 or module_number > len(modules):
-            return json.dumps({
-                "status": "error",
-                "message": f"Invalid module number. Available modules: 1-{len(modules)}",
-                "data": None
-            })
-        
-        module = modules[module_number - 1]
-        topic = module.get("topic", "unknown")
-        difficulty = module.get("difficulty", "beginner")
-        
-        steps = generate_lesson_steps(topic, difficulty, step_number)
-        
-        if step_number < 1 or step_number > len(steps):
-            return json.dumps({
-                "status": "error",
-                "message": f"Invalid step number. Available steps: 1-{len(steps)}",
-                "data": None
-            })
-        
-        current_step = steps[step_number - 1]
-        
-        response_data = {
-            "status": "success",
-            "data": {
-                "module_number": module_number,
-                "step_number": step_number,
-                "total_steps": len(steps),
-                "title": current_step['title'],
-                "content": current_step['content'],
-                "topic": topic.replace('_', ' ').title(),
-                "difficulty": difficulty.title(),
-                "next_step_title": steps[step_number]['title'] if step_number < len(steps) else "Module completion assessment",
-                "progress_percentage": round((step_number / len(steps)) * 100)
-            }
-        }
-        
-        return json.dumps(response_data)
-        
+        return _cached_response(learning_path, ("all_modules",), lambda: _build_all_module_contents(learning_path))
     except Exception as e:
-        return json.dumps({
-            "status": "error",
-            "message": f"Error retrieving lesson step: {str(e)}",
-            "data": None
-        })
+        return _error_json("Error retrieving module contents", e)
+
+def _build_all_module_contents(learning_path: Optional[Dict[str, Any]]) -> str:
+    """Builds the content of every module from a learning path as a single response"""
+    if learning_path is None:
+        return _NO_LEARNING_PATH_JSON
+    
+    path_data = learning_path["path_data"]
+    modules = path_data.get("modules") or ()
+    
+    return dumps({
+        "status": "success",
+        "data": {
+            "total_modules": len(modules),
+            "modules": [
+                _module_content_data(_module_ctx(path_data, module, module_number))
+                for module_number, module in enumerate(modules, 1)
+            ]
+        }
+    })
+
+def get_lesson_step(user_id: str, module_number: int, step_number: int) -> str:
+    """Retrieves a specific step within a learning module for progressive content delivery."""
+    error = _check_numbers(module_number, step_number)
+    if error is not None:
+        return error
+    return _get_lesson_step_from_path(db.get_cached_learning_path(user_id), module_number, step_number)
+
+def _get_lesson_step_from_path(learning_path: Optional[Dict[str, Any]], module_number: int, step_number: int) -> str:
+    """Serves the lesson step response for an already loaded learning path"""
+    return _serve_module(
+        learning_path, ("step", module_number, step_number), module_number,
+        lambda ctx: _render_lesson_step(ctx, step_number), "Error retrieving lesson step"
+    )
+
+def _render_lesson_step(ctx: ModuleCtx, step_number: int) -> str:
+    """Renders the lesson step response, or the error for a step outside the module"""
+    step_data = _lesson_step_data(ctx, step_number)
+    if step_data is None:
+        return _invalid_step_json(ctx)
+    return _SUCCESS_TEMPLATE % step_data
+
+def _invalid_step_json(ctx: ModuleCtx) -> str:
+    """Returns the error response for a step number outside the module's steps"""
+    return _INVALID_STEP_RANGE_TEMPLATE % len(generate_lesson_steps(ctx.topic, ctx.difficulty))
+
+def _lesson_step_data(ctx: ModuleCtx, step_number: int) -> Optional[str]:
+    """Returns the JSON data object for one lesson step, or None if the step number is out of range"""
+    topic, difficulty = ctx.topic, ctx.difficulty
+    
+    steps = generate_lesson_steps(topic, difficulty)
+    total_steps = len(steps)
+    
+    if not 1 <= step_number <= total_steps:
+        return None
+    
+    title_json, content_json = _step_fragments(topic, steps)[step_number - 1]
+    next_step_title = steps[step_number]['title'] if step_number < total_steps else "Module completion assessment"
+    
+    # Only the wrapper is serialized here; the step's title and content were encoded once up front
+    return _LESSON_STEP_TEMPLATE % (
+        ctx.module_number,
+        step_number,
+        total_steps,
+        title_json,
+        content_json,
+        dumps(_topic_display(topic)),
+        dumps(_difficulty_display(difficulty)),
+        dumps(next_step_title),
+        round((step_number / total_steps) * 100)
+    )
 
 def get_quiz_questions(user_id: str, module_number: int) -> str:
     """Generates quiz questions for a learning module to assess comprehension."""
-    try:
-        learning_path = db.get_user_learning_path(user_id)
-        if not learning_path:
-            return json.dumps({
-                "status": "error",
-                "message": "ASSESSMENT_INCOMPLETE",
-                "data": None
-            })
-        
-        modules = learning_path["path_data"].get("modules", [])
-        
-        if module_number < 1 or module_number > len(modules):
-            return json.dumps({
-                "status": "error",
-                "message": f"Invalid module number. Available modules: 1-{len(modules)}",
-                "data": None
-            })
-        
-        module = modules[module_number - 1]
-        topic = module.get("topic", "unknown")
-        difficulty = module.get("difficulty", "beginner")
-        
-        questions = generate_quiz_for_topic(topic, difficulty)
-        
-        response_data = {
-            "status": "success",
-            "data": {
-                "module_number": module_number,
-                "module_title": module.get('title', 'Unknown'),
-                "topic": topic.replace('_', ' ').title(),
-                "difficulty": difficulty.title(),
-                "questions": questions,
-                "total_questions": len(questions),
-                "instructions": "Select the best answer for each question to test your understanding of the key concepts."
-            }
-        }
-        
-        return json.dumps(response_data)
-        
-    except Exception as e:
-        return json.dumps({
-            "status": "error",
-            "message": f"Error generating quiz questions: {str(e)}",
-            "data": None
-        })
+    error = _check_numbers(module_number)
+    if error is not None:
+        return error
+    return _get_quiz_questions_from_path(db.get_cached_learning_path(user_id), module_number)
 
-def generate_content_for_topic(topic: str, difficulty: str, learning_style: str, risk_tolerance: str) -> str:
-    """Generates structured learning content for a specific financial topic."""
+def _get_quiz_questions_from_path(learning_path: Optional[Dict[str, Any]], module_number: int) -> str:
+    """Serves the quiz response for an already loaded learning path"""
+    return _serve_module(
+        learning_path, ("quiz", module_number), module_number,
+        lambda ctx: _SUCCESS_TEMPLATE % _quiz_data(ctx), "Error generating quiz questions"
+    )
+
+def _quiz_data(ctx: ModuleCtx) -> str:
+    """Returns the JSON data object for a module's quiz"""
+    topic, difficulty = ctx.topic, ctx.difficulty
     
-    # Content library organized by topic and difficulty
-    content_library = {
-        "investment_basics": {
-            "beginner": {
-                "overview": "Investment fundamentals teach you how to grow your money over time through different types of assets.",
-                "key_points": [
-                    "Stocks represent ownership shares in companies and offer growth potential",
-                    "Bonds are loans to companies/governments that provide steady income", 
-                    "ETFs bundle many investments together for instant diversification",
-                    "Higher potential returns typically come with higher risk levels"
-                ],
-                "practical_example": "If you invest $1,000 in an S&P 500 ETF, you own tiny pieces of 500 major companies. If these companies do well collectively, your investment grows. If they struggle, it may decline temporarily.",
-                "action_steps": [
-                    "Start with low-cost index funds or ETFs for diversification",
-                    "Invest regularly through dollar-cost averaging",
-                    "Focus on long-term growth rather than short-term fluctuations",
-                    "Keep fees low to maximize your returns"
-                ]
-            },
-            "intermediate": {
-                "overview": "Investment strategy focuses on building diversified portfolios that balance risk and return based on your goals and timeline.",
-                "key_points": [
-                    "Asset allocation is more important than individual investment selection",
-                    "Diversification across asset classes reduces portfolio volatility",
-                    "Rebalancing maintains your target allocation as markets change",
-                    "Time horizon determines appropriate risk level"
-                ],
-                "practical_example": "A 30-year-old might use a 70% stocks/30% bonds allocation for growth, while a 60-year-old might prefer 40% stocks/60% bonds for stability as retirement approaches.",
-                "action_steps": [
-                    "Determine your target asset allocation based on goals",
-                    "Diversify across domestic and international markets",
-                    "Rebalance quarterly or when allocations drift significantly",
-                    "Consider tax-efficient fund placement in different account types"
-                ]
-            }
-        },
-        "risk_management": {
-            "beginner": {
-                "overview": "Investment risk is the possibility of losing money, but understanding and managing risk helps you make better decisions.",
-                "key_points": [
-                    "All investments carry some level of risk - there's no such thing as a guaranteed return",
-                    "Risk and return are directly related - higher potential returns require accepting higher risk",
-                    "Your risk tolerance depends on your timeline, financial situation, and comfort level",
-                    "Diversification is the most effective way to reduce investment risk"
-                ],
-                "practical_example": "A savings account might earn 1% with virtually no risk, while stocks might average 7-10% annually but can lose 20-30% in bad years. Your choice depends on when you need the money.",
-                "action_steps": [
-                    "Assess your personal risk tolerance honestly",
-                    "Don't invest money you'll need within 3-5 years in stocks",
-                    "Spread investments across different asset types and sectors",
-                    "Focus on long-term trends rather than daily fluctuations"
-                ]
-            }
-        },
-        "retirement_planning": {
-            "beginner": {
-                "overview": "Retirement planning involves saving enough money to maintain your lifestyle when you stop working, using tax-advantaged accounts to maximize growth.",
-                "key_points": [
-                    "401(k) plans often include employer matching - free money you shouldn't leave on the table",
-                    "Traditional accounts are tax-deferred - you pay taxes when you withdraw",
-                    "Roth accounts are tax-free in retirement - you pay taxes upfront",
-                    "Starting early gives compound growth decades to work in your favor"
-                ],
-                "practical_example": "If your employer matches 50% of contributions up to 6% of salary, and you earn $50,000, contributing $3,000 gets you $1,500 in free matching - that's an instant 50% return!",
-                "action_steps": [
-                    "Contribute enough to get your full employer match",
-                    "Increase contributions by 1% each year",
-                    "Choose low-cost target-date funds if unsure about investments",
-                    "Don't cash out retirement accounts when changing jobs"
-                ]
-            }
-        }
-    }
+    questions = generate_quiz_for_topic(topic, difficulty)
     
-    # Get base content for topic and difficulty
-    base_content = content_library.get(topic, {}).get(difficulty, {
-        "overview": f"Learn essential concepts in {topic.replace('_', ' ')} to build your financial knowledge.",
-        "key_points": [
-            "Understanding fundamental principles",
-            "Applying concepts to real situations", 
-            "Making informed financial decisions",
-            "Building long-term wealth"
-        ],
-        "practical_example": "Practical examples help you apply these concepts to your own financial situation.",
-        "action_steps": [
-            "Review the key concepts carefully",
-            "Consider how they apply to your situation",
-            "Take small steps to implement what you learn",
-            "Track your progress over time"
-        ]
-    })
+    return _QUIZ_TEMPLATE % (
+        ctx.module_number,
+        dumps(ctx.title),
+        dumps(_topic_display(topic)),
+        dumps(_difficulty_display(difficulty)),
+        _quiz_fragment(topic, difficulty, questions),
+        len(questions)
+    )
+
+def get_module_bundle(user_id: str, module_number: int, step_number: int = 1) -> str:
+    """Retrieves a module's content, one of its lesson steps and its quiz together in a single call."""
+    error = _check_numbers(module_number, step_number)
+    if error is not None:
+        return error
+    return _get_module_bundle_from_path(db.get_cached_learning_path(user_id), module_number, step_number)
+
+def _get_module_bundle_from_path(learning_path: Optional[Dict[str, Any]], module_number: int, step_number: int) -> str:
+    """Serves the module bundle response for an already loaded learning path"""
+    return _serve_module(
+        learning_path, ("bundle", module_number, step_number), module_number,
+        lambda ctx: _render_module_bundle(ctx, step_number), "Error retrieving module bundle"
+    )
+
+def _render_module_bundle(ctx: ModuleCtx, step_number: int) -> str:
+    """Renders the module's content, lesson step and quiz from one resolved module"""
+    step_data = _lesson_step_data(ctx, step_number)
+    if step_data is None:
+        return _invalid_step_json(ctx)
     
-    # Customize content based on learning style
-    style_customization = {
-        "visual": {
-            "suggestion": "Use charts and graphs to visualize your progress and portfolio allocation.",
-            "tools": "Consider apps like Mint or Personal Capital for visual tracking."
-        },
-        "hands-on": {
-            "suggestion": "Practice with online calculators and paper trading accounts.",
-            "tools": "Try investment simulators before using real money."
+    return _BUNDLE_TEMPLATE % (
+        ctx.module_number,
+        dumps(_module_content_data(ctx)),
+        step_data,
+        _quiz_data(ctx)
+    )
+
+# Content library organized by topic and difficulty
+_CONTENT_LIBRARY = {
+    "investment_basics": {
+        "beginner": {
+            "overview": "Investment fundamentals teach you how to grow your money over time through different types of assets.",
+            "key_points": (
+                "Stocks represent ownership shares in companies and offer growth potential",
+                "Bonds are loans to companies/governments that provide steady income", 
+                "ETFs bundle many investments together for instant diversification",
+                "Higher potential returns typically come with higher risk levels"
+            ),
+            "practical_example": "If you invest $1,000 in an S&P 500 ETF, you own tiny pieces of 500 major companies. If these companies do well collectively, your investment grows. If they struggle, it may decline temporarily.",
+            "action_steps": (
+                "Start with low-cost index funds or ETFs for diversification",
+                "Invest regularly through dollar-cost averaging",
+                "Focus on long-term growth rather than short-term fluctuations",
+                "Keep fees low to maximize your returns"
+            )
         },
-        "analytical": {
-            "suggestion": "Study the mathematical relationships and historical data behind these concepts.",
-            "tools": "Research academic studies and detailed financial analysis."
+        "intermediate": {
+            "overview": "Investment strategy focuses on building diversified portfolios that balance risk and return based on your goals and timeline.",
+            "key_points": (
+                "Asset allocation is more important than individual investment selection",
+                "Diversification across asset classes reduces portfolio volatility",
+                "Rebalancing maintains your target allocation as markets change",
+                "Time horizon determines appropriate risk level"
+            ),
+            "practical_example": "A 30-year-old might use a 70% stocks/30% bonds allocation for growth, while a 60-year-old might prefer 40% stocks/60% bonds for stability as retirement approaches.",
+            "action_steps": (
+                "Determine your target asset allocation based on goals",
+                "Diversify across domestic and international markets",
+                "Rebalance quarterly or when allocations drift significantly",
+                "Consider tax-efficient fund placement in different account types"
+            )
         }
-    }
-    
-    # Customize based on risk tolerance  
-    risk_customization = {
-        "conservative": {
-            "approach": "Focus on capital preservation with modest growth potential.",
-            "emphasis": "Prioritize safety and steady, predictable returns."
-        },
-        "moderate": {
-            "approach": "Balance growth potential with reasonable risk management.",
-            "emphasis": "Diversify across risk levels for steady long-term growth."
-        },
-        "aggressive": {
-            "approach": "Pursue higher growth potential with acceptance of volatility.",
-            "emphasis": "Focus on long-term wealth building with higher risk tolerance."
+    },
+    "risk_management": {
+        "beginner": {
+            "overview": "Investment risk is the possibility of losing money, but understanding and managing risk helps you make better decisions.",
+            "key_points": (
+                "All investments carry some level of risk - there's no such thing as a guaranteed return",
+                "Risk and return are directly related - higher potential returns require accepting higher risk",
+                "Your risk tolerance depends on your timeline, financial situation, and comfort level",
+                "Diversification is the most effective way to reduce investment risk"
+            ),
+            "practical_example": "A savings account might earn 1% with virtually no risk, while stocks might average 7-10% annually but can lose 20-30% in bad years. Your choice depends on when you need the money.",
+            "action_steps": (
+                "Assess your personal risk tolerance honestly",
+                "Don't invest money you'll need within 3-5 years in stocks",
+                "Spread investments across different asset types and sectors",
+                "Focus on long-term trends rather than daily fluctuations"
+            )
+        }
+    },
+    "retirement_planning": {
+        "beginner": {
+            "overview": "Retirement planning involves saving enough money to maintain your lifestyle when you stop working, using tax-advantaged accounts to maximize growth.",
+            "key_points": (
+                "401(k) plans often include employer matching - free money you shouldn't leave on the table",
+                "Traditional accounts are tax-deferred - you pay taxes when you withdraw",
+                "Roth accounts are tax-free in retirement - you pay taxes upfront",
+                "Starting early gives compound growth decades to work in your favor"
+            ),
+            "practical_example": "If your employer matches 50% of contributions up to 6% of salary, and you earn $50,000, contributing $3,000 gets you $1,500 in free matching - that's an instant 50% return!",
+            "action_steps": (
+                "Contribute enough to get your full employer match",
+                "Increase contributions by 1% each year",
+                "Choose low-cost target-date funds if unsure about investments",
+                "Don't cash out retirement accounts when changing jobs"
+            )
         }
     }
-    
-    # Build the content
-    content = f"""
+}
+
+# Fallback lists for topics and difficulties missing from the library
+_DEFAULT_KEY_POINTS = (
+    "Understanding fundamental principles",
+    "Applying concepts to real situations",
+    "Making informed financial decisions",
+    "Building long-term wealth"
+)
+
+_DEFAULT_ACTION_STEPS = (
+    "Review the key concepts carefully",
+    "Consider how they apply to your situation",
+    "Take small steps to implement what you learn",
+    "Track your progress over time"
+)
+
+# Personalization notes keyed by learning style and by risk tolerance
+_STYLE_CUSTOMIZATION = {
+    "visual": {
+        "suggestion": "Use charts and graphs to visualize your progress and portfolio allocation.",
+        "tools": "Consider apps like Mint or Personal Capital for visual tracking."
+    },
+    "hands-on": {
+        "suggestion": "Practice with online calculators and paper trading accounts.",
+        "tools": "Try investment simulators before using real money."
+    },
+    "analytical": {
+        "suggestion": "Study the mathematical relationships and historical data behind these concepts.",
+        "tools": "Research academic studies and detailed financial analysis."
+    }
+}
+
+_RISK_CUSTOMIZATION = {
+    "conservative": {
+        "approach": "Focus on capital preservation with modest growth potential.",
+        "emphasis": "Prioritize safety and steady, predictable returns."
+    },
+    "moderate": {
+        "approach": "Balance growth potential with reasonable risk management.",
+        "emphasis": "Diversify across risk levels for steady long-term growth."
+    },
+    "aggressive": {
+        "approach": "Pursue higher growth potential with acceptance of volatility.",
+        "emphasis": "Focus on long-term wealth building with higher risk tolerance."
+    }
+}
+
+# HTML layout of a module's content, filled in by generate_content_for_topic
+_CONTENT_TEMPLATE = """
 <div class="lesson-overview">
 <h3>Overview</h3>
-<p>{base_content['overview']}</p>
+<p>{overview}</p>
 </div>
 
 <div class="key-concepts">
 <h3>Key Concepts</h3>
 <ul>
-"""
-    
-    for point in base_content['key_points']:
-        content += f"<li>{point}</li>\n"
-    
-    content += f"""
+{key_points}
 </ul>
 </div>
 
 <div class="practical-example">
 <h3>Practical Example</h3>
-<p>{base_content['practical_example']}</p>
+<p>{practical_example}</p>
 </div>
 
 <div class="action-steps">
 <h3>Action Steps</h3>
 <ol>
-"""
-    
-    for step in base_content['action_steps']:
-        content += f"<li>{step}</li>\n"
-    
-    style_info = style_customization.get(learning_style, style_customization['analytical'])
-    risk_info = risk_customization.get(risk_tolerance, risk_customization['moderate'])
-    
-    content += f"""
+{action_steps}
 </ol>
 </div>
 
 <div class="personalized-guidance">
 <h3>Personalized for You</h3>
-<p><strong>Learning Style ({learning_style.title()}):</strong> {style_info['suggestion']}</p>
-<p><strong>Risk Approach ({risk_tolerance.title()}):</strong> {risk_info['approach']}</p>
+<p><strong>Learning Style ({learning_style}):</strong> {style_suggestion}</p>
+<p><strong>Risk Approach ({risk_tolerance}):</strong> {risk_approach}</p>
 </div>
 """
+
+# The generators below are pure functions of a handful of strings, so each distinct
+# combination is assembled once and then served from the cache
+@lru_cache(maxsize=256)
+def get_content_data(topic: str, difficulty: str, learning_style: str, risk_tolerance: str) -> Dict[str, Any]:
+    """Returns the structured learning content for a financial topic, for clients that render it themselves."""
+    # The cached dict is shared between callers and must not be modified
     
-    return content
+    # Get base content for topic and difficulty
+    base_content = _CONTENT_LIBRARY.get(topic, {}).get(difficulty)
+    if base_content is None:
+        base_content = {
+            "overview": f"Learn essential concepts in {topic.replace('_', ' ')} to build your financial knowledge.",
+            "key_points": _DEFAULT_KEY_POINTS,
+            "practical_example": "Practical examples help you apply these concepts to your own financial situation.",
+            "action_steps": _DEFAULT_ACTION_STEPS
+        }
+    
+    # Customize content based on learning style and risk tolerance
+    style_info = _STYLE_CUSTOMIZATION.get(learning_style, _STYLE_CUSTOMIZATION['analytical'])
+    risk_info = _RISK_CUSTOMIZATION.get(risk_tolerance, _RISK_CUSTOMIZATION['moderate'])
+    
+    return {
+        "overview": base_content['overview'],
+        "key_points": base_content['key_points'],
+        "practical_example": base_content['practical_example'],
+        "action_steps": base_content['action_steps'],
+        "learning_style": _title(learning_style),
+        "style_suggestion": style_info['suggestion'],
+        "risk_tolerance": _title(risk_tolerance),
+        "risk_approach": risk_info['approach']
+    }
 
-def generate_lesson_steps(topic: str, difficulty: str, step_number: int) -> List[Dict[str, str]]:
-    """Generates a sequence of learning steps for progressive content delivery."""
+@lru_cache(maxsize=256)
+def generate_content_for_topic(topic: str, difficulty: str, learning_style: str, risk_tolerance: str) -> str:
+    """Generates structured learning content for a specific financial topic."""
+    data = get_content_data(topic, difficulty, learning_style, risk_tolerance)
     
-    step_templates = {
-        "investment_basics": [
-            {
-                "title": "What Are Investments?", 
-                "content": """
+    # Build the list items with one join each instead of growing the string per item
+    key_points = "".join(f"<li>{point}</li>\n" for point in data['key_points'])
+    action_steps = "".join(f"<li>{step}</li>\n" for step in data['action_steps'])
+    
+    return _CONTENT_TEMPLATE.format(
+        overview=data['overview'],
+        key_points=key_points,
+        practical_example=data['practical_example'],
+        action_steps=action_steps,
+        learning_style=data['learning_style'],
+        style_suggestion=data['style_suggestion'],
+        risk_tolerance=data['risk_tolerance'],
+        risk_approach=data['risk_approach']
+    )
+
+# Lesson steps for each topic, served in order by get_lesson_step
+_STEP_TEMPLATES = {
+    "investment_basics": (
+        {
+            "title": "What Are Investments?", 
+            "content": """
                 <h3>Understanding Investments</h3>
                 <p>Investments are assets you purchase with the expectation that they will generate income or appreciate in value over time. Think of them as tools to grow your wealth rather than just storing it.</p>
                 
@@ -367,10 +598,10 @@ def generate_lesson_steps(topic: str, difficulty: str, step_number: int) -> List
                 
                 <p><strong>Key Takeaway:</strong> Investing is about putting your money to work so it can grow while you focus on other aspects of your life.</p>
                 """
-            },
-            {
-                "title": "Types of Investments",
-                "content": """
+        },
+        {
+            "title": "Types of Investments",
+            "content": """
                 <h3>Main Investment Categories</h3>
                 
                 <h4>1. Stocks (Equities)</h4>
@@ -387,10 +618,10 @@ def generate_lesson_steps(topic: str, difficulty: str, step_number: int) -> List
                 
                 <p><strong>Pro Tip:</strong> Start with broad market ETFs for instant diversification across hundreds of companies.</p>
                 """
-            },
-            {
-                "title": "Risk and Return Relationship",
-                "content": """
+        },
+        {
+            "title": "Risk and Return Relationship",
+            "content": """
                 <h3>Understanding the Risk-Return Tradeoff</h3>
                 <p>One of the most important concepts in investing is that risk and potential return are directly related.</p>
                 
@@ -406,10 +637,10 @@ def generate_lesson_steps(topic: str, difficulty: str, step_number: int) -> List
                 
                 <p><strong>Remember:</strong> No investment is guaranteed, but historically, diversified stock investments have provided the best long-term returns.</p>
                 """
-            },
-            {
-                "title": "Getting Started with Investing",
-                "content": """
+        },
+        {
+            "title": "Getting Started with Investing",
+            "content": """
                 <h3>Your First Steps into Investing</h3>
                 
                 <h4>1. Build Your Foundation</h4>
@@ -432,10 +663,10 @@ def generate_lesson_steps(topic: str, difficulty: str, step_number: int) -> List
                 <h4>4. Automate Your Investing</h4>
                 <p>Set up automatic monthly contributions to build wealth consistently without having to think about it.</p>
                 """
-            },
-            {
-                "title": "Building Your Investment Portfolio",
-                "content": """
+        },
+        {
+            "title": "Building Your Investment Portfolio",
+            "content": """
                 <h3>Creating a Balanced Portfolio</h3>
                 
                 <h4>Asset Allocation Basics</h4>
@@ -457,12 +688,12 @@ def generate_lesson_steps(topic: str, difficulty: str, step_number: int) -> List
                 
                 <p><strong>Bottom Line:</strong> A well-diversified portfolio helps reduce risk while still capturing market growth over time.</p>
                 """
-            }
-        ],
-        "risk_management": [
-            {
-                "title": "Understanding Investment Risk",
-                "content": """
+        }
+    ),
+    "risk_management": (
+        {
+            "title": "Understanding Investment Risk",
+            "content": """
                 <h3>What Is Investment Risk?</h3>
                 <p>Investment risk is the possibility that your investments will lose value or not perform as expected. While this might sound scary, understanding risk helps you make better decisions.</p>
                 
@@ -476,10 +707,10 @@ def generate_lesson_steps(topic: str, difficulty: str, step_number: int) -> List
                 
                 <p><strong>Important:</strong> Not investing is also risky - your money loses purchasing power to inflation over time.</p>
                 """
-            },
-            {
-                "title": "Assessing Your Risk Tolerance",
-                "content": """
+        },
+        {
+            "title": "Assessing Your Risk Tolerance",
+            "content": """
                 <h3>How Much Risk Can You Handle?</h3>
                 <p>Your risk tolerance depends on several factors that are unique to your situation.</p>
                 
@@ -501,12 +732,12 @@ def generate_lesson_steps(topic: str, difficulty: str, step_number: int) -> List
                 
                 <p>Your honest answer helps determine your appropriate risk level.</p>
                 """
-            }
-        ],
-        "retirement_planning": [
-            {
-                "title": "Retirement Planning Fundamentals",
-                "content": """
+        }
+    ),
+    "retirement_planning": (
+        {
+            "title": "Retirement Planning Fundamentals",
+            "content": """
                 <h3>Planning for Your Financial Future</h3>
                 <p>Retirement planning is about accumulating enough money to maintain your desired lifestyle when you stop working. The earlier you start, the easier it becomes.</p>
                 
@@ -528,177 +759,289 @@ def generate_lesson_steps(topic: str, difficulty: str, step_number: int) -> List
                 
                 <p><strong>Key Insight:</strong> Time is your greatest asset in retirement planning.</p>
                 """
-            }
-        ]
-    }
-    
-    return step_templates.get(topic, [
+        },
+    )
+}
+
+def generate_lesson_steps(topic: str, difficulty: str) -> Tuple[Dict[str, str], ...]:
+    """Generates a sequence of learning steps for progressive content delivery."""
+    # The steps don't vary by difficulty, so they are cached per topic alone
+    return _lesson_steps_for_topic(topic)
+
+@lru_cache(maxsize=64)
+def _lesson_steps_for_topic(topic: str) -> Tuple[Dict[str, str], ...]:
+    """Builds the lesson steps for a topic, falling back to generic steps for unknown topics"""
+    # Returned as a tuple since the cached result is shared between callers
+    steps = _STEP_TEMPLATES.get(topic)
+    return tuple(steps if steps is not None else _default_steps(topic))
+
+def _default_steps(topic: str) -> List[Dict[str, str]]:
+    """Builds generic placeholder steps for a topic with no step templates"""
+    return [
         {"title": f"Learning Step {i+1}", "content": f"<p>Educational content for step {i+1} of {topic.replace('_', ' ')}.</p>"} 
         for i in range(5)
-    ])
+    ]
 
-def generate_quiz_for_topic(topic: str, difficulty: str) -> List[Dict[str, Any]]:
-    """Generates quiz questions specific to a financial topic and difficulty level."""
-    
-    quiz_bank = {
-        "investment_basics": {
-            "beginner": [
-                {
-                    "question": "What does owning a stock represent?",
-                    "options": [
-                        "A loan to a company",
-                        "Ownership in a company", 
-                        "A government bond",
-                        "A savings account"
-                    ],
-                    "correct": "B",
-                    "explanation": "When you buy stock, you purchase a small ownership stake in that company."
-                },
-                {
-                    "question": "Which investment typically offers the highest potential returns over long periods?",
-                    "options": [
-                        "Savings accounts",
-                        "Government bonds", 
-                        "Stocks",
-                        "Certificates of deposit"
-                    ],
-                    "correct": "C",
-                    "explanation": "Historically, stocks have provided the highest long-term returns, though with higher volatility."
-                },
-                {
-                    "question": "What is the main benefit of an ETF?",
-                    "options": [
-                        "Guaranteed returns",
-                        "Instant diversification",
-                        "No fees",
-                        "Government insurance"
-                    ],
-                    "correct": "B",
-                    "explanation": "ETFs allow you to own pieces of many different investments through a single purchase."
-                },
-                {
-                    "question": "What is the relationship between risk and return in investing?",
-                    "options": [
-                        "Higher risk always means higher returns",
-                        "There is no relationship",
-                        "Higher potential returns typically require accepting higher risk",
-                        "Lower risk always means higher returns"
-                    ],
-                    "correct": "C",
-                    "explanation": "While not guaranteed, investments with higher potential returns generally come with higher risk."
-                }
-            ],
-            "intermediate": [
-                {
-                    "question": "What is the primary benefit of diversification?",
-                    "options": [
-                        "Higher returns",
-                        "Lower fees",
-                        "Reduced overall risk",
-                        "Faster growth"
-                    ],
-                    "correct": "C",
-                    "explanation": "Diversification helps reduce risk by spreading investments across different assets that don't move together."
-                },
-                {
-                    "question": "Dollar-cost averaging involves:",
-                    "options": [
-                        "Buying all investments at once",
-                        "Investing the same amount regularly regardless of market conditions",
-                        "Only buying when prices are low",
-                        "Selling when prices are high"
-                    ],
-                    "correct": "B",
-                    "explanation": "Dollar-cost averaging means investing a fixed amount regularly, which can help smooth out market volatility."
-                }
-            ]
-        },
-        "risk_management": {
-            "beginner": [
-                {
-                    "question": "What is the most effective way to manage investment risk?",
-                    "options": [
-                        "Buying only one stock",
-                        "Diversification across different investments",
-                        "Trying to time the market",
-                        "Using only savings accounts"
-                    ],
-                    "correct": "B",
-                    "explanation": "Diversification across different types of investments is the most reliable way to reduce overall portfolio risk."
-                },
-                {
-                    "question": "What does 'risk tolerance' refer to?",
-                    "options": [
-                        "Your ability to predict market movements",
-                        "Your comfort level with the possibility of losing money",
-                        "The amount of money you have to invest",
-                        "The number of stocks you own"
-                    ],
-                    "correct": "B",
-                    "explanation": "Risk tolerance is your emotional and financial ability to handle potential investment losses."
-                }
-            ]
-        },
-        "retirement_planning": {
-            "beginner": [
-                {
-                    "question": "What is the main advantage of a 401(k) plan?",
-                    "options": [
-                        "Guaranteed returns",
-                        "No contribution limits",
-                        "Tax advantages and potential employer matching",
-                        "No early withdrawal penalties"
-                    ],
-                    "correct": "C",
-                    "explanation": "401(k) plans offer tax benefits and many employers provide matching contributions, which is free money."
-                },
-                {
-                    "question": "When should you start saving for retirement?",
-                    "options": [
-                        "When you turn 40",
-                        "As soon as you have a steady income",
-                        "Only after buying a house",
-                        "When you get a promotion"
-                    ],
-                    "correct": "B",
-                    "explanation": "The earlier you start, the more time compound growth has to work in your favor."
-                }
-            ]
-        }
+# Quiz questions organized by topic and difficulty, frozen below since cached results share them
+_QUIZ_BANK = {
+    "investment_basics": {
+        "beginner": (
+            {
+                "question": "What does owning a stock represent?",
+                "options": (
+                    "A loan to a company",
+                    "Ownership in a company", 
+                    "A government bond",
+                    "A savings account"
+                ),
+                "correct": "B",
+                "explanation": "When you buy stock, you purchase a small ownership stake in that company."
+            },
+            {
+                "question": "Which investment typically offers the highest potential returns over long periods?",
+                "options": (
+                    "Savings accounts",
+                    "Government bonds", 
+                    "Stocks",
+                    "Certificates of deposit"
+                ),
+                "correct": "C",
+                "explanation": "Historically, stocks have provided the highest long-term returns, though with higher volatility."
+            },
+            {
+                "question": "What is the main benefit of an ETF?",
+                "options": (
+                    "Guaranteed returns",
+                    "Instant diversification",
+                    "No fees",
+                    "Government insurance"
+                ),
+                "correct": "B",
+                "explanation": "ETFs allow you to own pieces of many different investments through a single purchase."
+            },
+            {
+                "question": "What is the relationship between risk and return in investing?",
+                "options": (
+                    "Higher risk always means higher returns",
+                    "There is no relationship",
+                    "Higher potential returns typically require accepting higher risk",
+                    "Lower risk always means higher returns"
+                ),
+                "correct": "C",
+                "explanation": "While not guaranteed, investments with higher potential returns generally come with higher risk."
+            }
+        ),
+        "intermediate": (
+            {
+                "question": "What is the primary benefit of diversification?",
+                "options": (
+                    "Higher returns",
+                    "Lower fees",
+                    "Reduced overall risk",
+                    "Faster growth"
+                ),
+                "correct": "C",
+                "explanation": "Diversification helps reduce risk by spreading investments across different assets that don't move together."
+            },
+            {
+                "question": "Dollar-cost averaging involves:",
+                "options": (
+                    "Buying all investments at once",
+                    "Investing the same amount regularly regardless of market conditions",
+                    "Only buying when prices are low",
+                    "Selling when prices are high"
+                ),
+                "correct": "B",
+                "explanation": "Dollar-cost averaging means investing a fixed amount regularly, which can help smooth out market volatility."
+            }
+        )
+    },
+    "risk_management": {
+        "beginner": (
+            {
+                "question": "What is the most effective way to manage investment risk?",
+                "options": (
+                    "Buying only one stock",
+                    "Diversification across different investments",
+                    "Trying to time the market",
+                    "Using only savings accounts"
+                ),
+                "correct": "B",
+                "explanation": "Diversification across different types of investments is the most reliable way to reduce overall portfolio risk."
+            },
+            {
+                "question": "What does 'risk tolerance' refer to?",
+                "options": (
+                    "Your ability to predict market movements",
+                    "Your comfort level with the possibility of losing money",
+                    "The amount of money you have to invest",
+                    "The number of stocks you own"
+                ),
+                "correct": "B",
+                "explanation": "Risk tolerance is your emotional and financial ability to handle potential investment losses."
+            }
+        )
+    },
+    "retirement_planning": {
+        "beginner": (
+            {
+                "question": "What is the main advantage of a 401(k) plan?",
+                "options": (
+                    "Guaranteed returns",
+                    "No contribution limits",
+                    "Tax advantages and potential employer matching",
+                    "No early withdrawal penalties"
+                ),
+                "correct": "C",
+                "explanation": "401(k) plans offer tax benefits and many employers provide matching contributions, which is free money."
+            },
+            {
+                "question": "When should you start saving for retirement?",
+                "options": (
+                    "When you turn 40",
+                    "As soon as you have a steady income",
+                    "Only after buying a house",
+                    "When you get a promotion"
+                ),
+                "correct": "B",
+                "explanation": "The earlier you start, the more time compound growth has to work in your favor."
+            }
+        )
     }
+}
+_QUIZ_BANK = MappingProxyType({topic: MappingProxyType(levels) for topic, levels in _QUIZ_BANK.items()})
+_NO_LEVELS = MappingProxyType({})
+
+# Answer options for the generic question asked on topics missing from the bank
+_FALLBACK_QUIZ_OPTIONS = (
+    "Understanding the basic concepts",
+    "Memorizing complex formulas", 
+    "Following market predictions",
+    "Avoiding all risks"
+)
+
+@lru_cache(maxsize=256)
+def generate_quiz_for_topic(topic: str, difficulty: str) -> Tuple[Dict[str, Any], ...]:
+    """Generates quiz questions specific to a financial topic and difficulty level."""
     
     # Get questions for the topic and difficulty, with fallbacks
-    questions = quiz_bank.get(topic, {}).get(difficulty, [])
+    questions = _QUIZ_BANK.get(topic, _NO_LEVELS).get(difficulty, ())
     
-    # If no specific questions exist, create generic ones
+    # If no specific questions exist, create a generic one
     if not questions:
+        topic_text = topic.replace('_', ' ')
         questions = [
             {
-                "question": f"Which of the following is most important when learning about {topic.replace('_', ' ')}?",
-                "options": [
-                    "Understanding the basic concepts",
-                    "Memorizing complex formulas", 
-                    "Following market predictions",
-                    "Avoiding all risks"
-                ],
+                "question": f"Which of the following is most important when learning about {topic_text}?",
+                "options": _FALLBACK_QUIZ_OPTIONS,
                 "correct": "A",
-                "explanation": f"Understanding fundamental concepts is the foundation of learning {topic.replace('_', ' ')}."
+                "explanation": f"Understanding fundamental concepts is the foundation of learning {topic_text}."
             }
         ]
     
-    return questions
+    return tuple(questions)
+
+# Lesson step and quiz responses are assembled around JSON fragments encoded at import
+# time, since the step and question text never changes at runtime
+_SUCCESS_TEMPLATE = '{"status":"success","data":%s}'
+_LESSON_STEP_TEMPLATE = (
+    '{"module_number":%d,"step_number":%d,"total_steps":%d,'
+    '"title":%s,"content":%s,"topic":%s,"difficulty":%s,"next_step_title":%s,'
+    '"progress_percentage":%d}'
+)
+_QUIZ_TEMPLATE = (
+    '{"module_number":%d,"module_title":%s,"topic":%s,'
+    '"difficulty":%s,"questions":%s,"total_questions":%d,"instructions":'
+    + dumps("Select the best answer for each question to test your understanding of the key concepts.")
+    + '}'
+)
+_BUNDLE_TEMPLATE = '{"status":"success","data":{"module_number":%d,"content":%s,"step":%s,"quiz":%s}}'
+
+
+def _encode_steps(steps) -> Tuple[Tuple[str, str], ...]:
+    """Encode each step's title and content as JSON fragments"""
+    return tuple((dumps(step["title"]), dumps(step["content"])) for step in steps)
+
+
+_STEP_FRAGMENTS = {topic: _encode_steps(steps) for topic, steps in _STEP_TEMPLATES.items()}
+_QUIZ_FRAGMENTS = {
+    (topic, difficulty): dumps(questions)
+    for topic, levels in _QUIZ_BANK.items()
+    for difficulty, questions in levels.items()
+}
+
+
+def _step_fragments(topic: str, steps) -> Tuple[Tuple[str, str], ...]:
+    """Returns the encoded steps for a topic, encoding the generic fallback steps on demand"""
+    fragments = _STEP_FRAGMENTS.get(topic)
+    return fragments if fragments is not None else _encode_steps(steps)
+
+
+def _quiz_fragment(topic: str, difficulty: str, questions) -> str:
+    """Returns the encoded question list for a topic, encoding the generic fallback on demand"""
+    fragment = _QUIZ_FRAGMENTS.get((topic, difficulty))
+    return fragment if fragment is not None else dumps(questions)
+
+def _warm_caches():
+    """Fill the lesson content, step and quiz caches for every combination in the libraries"""
+    # A few dozen combinations, well inside the lru_cache sizes, built in well under a millisecond
+    for topic, levels in _CONTENT_LIBRARY.items():
+        for difficulty in levels:
+            for learning_style in _STYLE_CUSTOMIZATION:
+                for risk_tolerance in _RISK_CUSTOMIZATION:
+                    generate_content_for_topic(topic, difficulty, learning_style, risk_tolerance)
+    for topic in _STEP_TEMPLATES:
+        _lesson_steps_for_topic(topic)
+    for topic, levels in _QUIZ_BANK.items():
+        for difficulty in levels:
+            generate_quiz_for_topic(topic, difficulty)
+
+
+if WARM_CACHE:
+    _warm_caches()
 
 # Keep all the other existing functions (process_content_requests, send_content_response, get_database_info, etc.)
 # but update them to return JSON where appropriate
 
-def get_database_info(user_id: str) -> str:
+@dataclass(slots=True)
+class LearningStateContext:
+    """A user's learning path and progress, loaded once and shared by the tool calls of one agent turn"""
+    user_id: str
+    learning_path: Optional[Dict[str, Any]]
+    progress_data: List[Tuple]
+
+
+# Stored under ADK's temp: prefix, which lives only for the current invocation and is never persisted
+_LEARNING_STATE_KEY = "temp:learning_state"
+
+
+def _load_learning_state(user_id: str, tool_context: Optional[ToolContext] = None) -> LearningStateContext:
+    """Returns the user's learning state, reusing the one already loaded this turn when there is one"""
+    if tool_context is not None:
+        state = tool_context.state.get(_LEARNING_STATE_KEY)
+        if state is not None and state.user_id == user_id:
+            return state
+
+    learning_path, progress_data = db.get_user_state(user_id)
+    state = LearningStateContext(user_id, learning_path, progress_data)
+    if tool_context is not None:
+        tool_context.state[_LEARNING_STATE_KEY] = state
+    return state
+
+def get_database_info(user_id: str, tool_context: Optional[ToolContext] = None) -> str:
     """Retrieves database statistics and content delivery agent specific information for debugging."""
     try:
-        stats = db.get_database_stats()
+        stats = db.get_cached_database_stats()
         
         # Get user-specific data
-        learning_path = db.get_user_learning_path(user_id)
-        progress_data = db.get_user_progress(user_id)
+        state = _load_learning_state(user_id, tool_context)
+        learning_path, progress_data = state.learning_path, state.progress_data
+        
+        # Paths nearly always carry a modules list; a missing path (None) or list is the rare case
+        try:
+            modules_available = len(learning_path["path_data"]["modules"])
+        except (KeyError, TypeError):
+            modules_available = 0
         
         response_data = {
             "status": "success",
@@ -710,63 +1053,73 @@ def get_database_info(user_id: str) -> str:
                 },
                 "user_data": {
                     "learning_path_exists": learning_path is not None,
-                    "modules_available": len(learning_path['path_data'].get('modules', [])) if learning_path else 0,
-                    "progress_entries": len(progress_data) if progress_data else 0
+                    "modules_available": modules_available,
+                    "progress_entries": len(progress_data or ())
                 },
                 "database_info": "financial_literacy.db"
             }
         }
         
-        return json.dumps(response_data)
+        return dumps(response_data)
         
     except Exception as e:
-        return json.dumps({
-            "status": "error",
-            "message": f"Error retrieving database info: {str(e)}",
-            "data": None
-        })
+        return _error_json("Error retrieving database info", e)
+
+# The reply for users without a learning path never varies, so it is serialized once
+_ASSESSMENT_INCOMPLETE_JSON = dumps({
+    "status": "assessment_incomplete",
+    "message": "ASSESSMENT_REQUIRED",
+    "data": {
+        "assessment_complete": False,
+        "user_guidance": {
+            "title": "Complete Your Financial Assessment",
+            "description": "To access personalized learning content, you need to complete a quick assessment.",
+            "action_required": "Return to the main chat dashboard to begin your assessment",
+            "estimated_time": "5-10 minutes",
+            "benefits": [
+                "Personalized learning path based on your knowledge level",
+                "Content adapted to your learning style", 
+                "Customized examples for your risk tolerance",
+                "Progress tracking tailored to your goals"
+            ]
+        },
+        "next_steps": [
+            "Navigate to the main chat dashboard",
+            "Start conversation with the Assessment Agent",
+            "Answer questions about your financial knowledge",
+            "Receive your personalized learning plan"
+        ]
+    }
+})
+
+# Error reply for check_assessment_status; only the message and error details vary
+_ASSESSMENT_STATUS_ERROR_TEMPLATE = (
+    '{"status":"error","message":%s,"data":{"assessment_complete":false,"error_details":%s,"user_guidance":'
+    + dumps({
+        "title": "System Error",
+        "description": "There was an error checking your assessment status.",
+        "action_required": "Please try refreshing the page or contact support"
+    })
+    + '}}'
+)
 
 # Also update the check_assessment_status function that was added earlier
-def check_assessment_status(user_id: str) -> str:
+def check_assessment_status(user_id: str, tool_context: Optional[ToolContext] = None) -> str:
     """Checks if user has completed their initial assessment and has a learning path."""
     try:
         # Check if user has completed assessment by looking for learning path
-        learning_path = db.get_user_learning_path(user_id)
+        state = _load_learning_state(user_id, tool_context)
+        learning_path, progress_data = state.learning_path, state.progress_data
         
-        if not learning_path:
-            return json.dumps({
-                "status": "assessment_incomplete",
-                "message": "ASSESSMENT_REQUIRED",
-                "data": {
-                    "assessment_complete": False,
-                    "user_guidance": {
-                        "title": "Complete Your Financial Assessment",
-                        "description": "To access personalized learning content, you need to complete a quick assessment.",
-                        "action_required": "Return to the main chat dashboard to begin your assessment",
-                        "estimated_time": "5-10 minutes",
-                        "benefits": [
-                            "Personalized learning path based on your knowledge level",
-                            "Content adapted to your learning style", 
-                            "Customized examples for your risk tolerance",
-                            "Progress tracking tailored to your goals"
-                        ]
-                    },
-                    "next_steps": [
-                        "Navigate to the main chat dashboard",
-                        "Start conversation with the Assessment Agent",
-                        "Answer questions about your financial knowledge",
-                        "Receive your personalized learning plan"
-                    ]
-                }
-            })
+        if learning_path is None:
+            return _ASSESSMENT_INCOMPLETE_JSON
         
-        # Assessment is complete - check progress
-        progress_data = db.get_user_progress(user_id)
-        path_data = learning_path.get("path_data", {})
+        # Assessment is complete (the read above also refreshed the cached learning path)
+        path_data = learning_path.get("path_data") or {}
         risk_tolerance = path_data.get("risk_tolerance", "moderate")
         learning_style = path_data.get("learning_style", "analytical")
         
-        return json.dumps({
+        return dumps({
             "status": "assessment_complete", 
             "message": "READY_FOR_LEARNING",
             "data": {
@@ -777,8 +1130,8 @@ def check_assessment_status(user_id: str) -> str:
                     "assessment_date": learning_path.get("created_at", "Unknown")
                 },
                 "progress_summary": {
-                    "modules_available": len(path_data.get("modules", [])),
-                    "progress_entries": len(progress_data) if progress_data else 0,
+                    "modules_available": len(path_data.get("modules") or ()),
+                    "progress_entries": len(progress_data or ()),
                     "learning_path_ready": True
                 },
                 "welcome_message": f"Welcome back! Your {learning_style} learning path is ready with {risk_tolerance} risk-focused content."
@@ -786,28 +1139,36 @@ def check_assessment_status(user_id: str) -> str:
         })
         
     except Exception as e:
-        return json.dumps({
-            "status": "error",
-            "message": f"Error checking assessment status: {str(e)}",
-            "data": {
-                "assessment_complete": False,
-                "error_details": str(e),
-                "user_guidance": {
-                    "title": "System Error",
-                    "description": "There was an error checking your assessment status.",
-                    "action_required": "Please try refreshing the page or contact support"
-                }
-            }
-        })
+        return _ASSESSMENT_STATUS_ERROR_TEMPLATE % (dumps(f"Error checking assessment status: {e}"), dumps(str(e)))
+
+# Builders for each A2A request type, called with the loaded learning path and the request data
+_REQUEST_HANDLERS: Dict[str, Callable[[Optional[Dict[str, Any]], Dict[str, Any]], str]] = {
+    "get_module_content": lambda path, data: _get_module_content_from_path(path, data.get("module_number", 1)),
+    "get_lesson_step": lambda path, data: _get_lesson_step_from_path(
+        path, data.get("module_number", 1), data.get("step_number", 1)
+    ),
+    "get_quiz_questions": lambda path, data: _get_quiz_questions_from_path(path, data.get("module_number", 1)),
+    "get_all_module_contents": lambda path, data: _get_all_module_contents_from_path(path),
+    "get_module_bundle": lambda path, data: _get_module_bundle_from_path(
+        path, data.get("module_number", 1), data.get("step_number", 1)
+    ),
+}
+
+# Builders for send_content_response, called with the learning path, module number and step number
+_CONTENT_SENDERS: Dict[str, Callable[[Optional[Dict[str, Any]], int, int], str]] = {
+    "module": lambda path, module_number, step_number: _get_module_content_from_path(path, module_number),
+    "step": _get_lesson_step_from_path,
+    "quiz": lambda path, module_number, step_number: _get_quiz_questions_from_path(path, module_number),
+}
 
 def process_content_requests(user_id: str) -> str:
     """Reads and processes incoming content requests from other agents via A2A communication."""
     try:
-        # Get latest content request from progress agent
-        request = db.get_latest_handoff(user_id, "content_delivery_agent")
+        # Get latest content request from progress agent along with the learning path it refers to
+        request, learning_path = db.get_handoff_with_context(user_id, "content_delivery_agent")
         
-        if not request:
-            return json.dumps({
+        if request is None:
+            return dumps({
                 "status": "no_requests",
                 "message": "No content requests found from other agents.",
                 "data": None
@@ -817,27 +1178,15 @@ def process_content_requests(user_id: str) -> str:
         request_type = request_data.get("request_type")
         
         # Process different types of content requests
-        content_response = ""
+        handler = _REQUEST_HANDLERS.get(request_type)
         
-        if request_type == "get_module_content":
-            module_number = request_data.get("module_number", 1)
-            content_response = get_module_content(user_id, module_number)
-            
-        elif request_type == "get_lesson_step":
-            module_number = request_data.get("module_number", 1)
-            step_number = request_data.get("step_number", 1)
-            content_response = get_lesson_step(user_id, module_number, step_number)
-            
-        elif request_type == "get_quiz_questions":
-            module_number = request_data.get("module_number", 1)
-            content_response = get_quiz_questions(user_id, module_number)
-            
-        else:
-            return json.dumps({
+        if handler is None:
+            return dumps({
                 "status": "error",
                 "message": f"Unknown request type: {request_type}",
                 "data": None
             })
+        content_response = handler(learning_path, request_data)
         
         # Send response back via A2A communication
         response_data = {
@@ -855,41 +1204,33 @@ def process_content_requests(user_id: str) -> str:
         )
         
         if success:
-            return json.dumps({
+            return dumps({
                 "status": "success",
                 "message": f"Content request processed and response sent. Request type: {request_type}",
                 "data": {"request_type": request_type, "content_delivered": True}
             })
         else:
-            return json.dumps({
+            return dumps({
                 "status": "error",
                 "message": "Error sending content response back to progress agent.",
                 "data": None
             })
             
     except Exception as e:
-        return json.dumps({
-            "status": "error",
-            "message": f"Error processing content requests: {str(e)}",
-            "data": None
-        })
+        return _error_json("Error processing content requests", e)
 
 def send_content_response(user_id: str, content_type: str, module_number: int, step_number: int = 1) -> str:
     """Manually sends content response to progress agent for specific requests."""
     try:
-        # Generate content based on type
-        if content_type == "module":
-            content = get_module_content(user_id, module_number)
-        elif content_type == "step":
-            content = get_lesson_step(user_id, module_number, step_number)
-        elif content_type == "quiz":
-            content = get_quiz_questions(user_id, module_number)
-        else:
-            return json.dumps({
+        # Generate content based on type, rejecting unknown types before loading the path
+        sender = _CONTENT_SENDERS.get(content_type)
+        if sender is None:
+            return dumps({
                 "status": "error",
                 "message": f"Invalid content type: {content_type}. Use 'module', 'step', or 'quiz'",
                 "data": None
             })
+        content = sender(db.get_cached_learning_path(user_id), module_number, step_number)
         
         # Send response via A2A
         response_data = {
@@ -908,7 +1249,7 @@ def send_content_response(user_id: str, content_type: str, module_number: int, s
         )
         
         if success:
-            return json.dumps({
+            return dumps({
                 "status": "success",
                 "message": f"Content sent to progress agent: {content_type} for module {module_number}",
                 "data": {
@@ -918,15 +1259,11 @@ def send_content_response(user_id: str, content_type: str, module_number: int, s
                 }
             })
         else:
-            return json.dumps({
+            return dumps({
                 "status": "error", 
                 "message": "Error sending content to progress agent.",
                 "data": None
             })
             
     except Exception as e:
-        return json.dumps({
-            "status": "error",
-            "message": f"Error sending content response: {str(e)}",
-            "data": None
-        })
\ No newline at end of file
+        return _error_json("Error sending content response", e)
\ No newline at end of file
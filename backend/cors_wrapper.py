@@ -1,12 +1,23 @@
 # cors_wrapper.py - Add CORS to your Flask agents
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import requests
+from requests.adapters import HTTPAdapter
+
+from shared.json_provider import OrjsonProvider
 
 app = Flask(__name__)
+# Parse and serialize the proxied JSON with orjson, as the agents themselves do
+app.json = OrjsonProvider(app)
 
-# Enable CORS for all domains and all routes
-CORS(app, origins=["http://localhost:4200", "http://localhost:3000"])
+# Enable CORS for the frontend on all routes; flask_cors also answers preflight
+# OPTIONS requests itself, before any view runs
+CORS(
+    app,
+    origins=["http://localhost:4200", "http://localhost:3000"],
+    methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Content-Type"]
+)
 
 # Or more permissive for development
 # CORS(app, origins="*")
@@ -19,16 +30,13 @@ AGENT_PORTS = {
     'content': 8003
 }
 
-@app.route('/<agent_type>/run', methods=['POST', 'OPTIONS'])
+# One pooled session for all forwarding, so consecutive calls to an agent reuse
+# its keep-alive connection instead of opening a new socket per request
+session = requests.Session()
+session.mount('http://', HTTPAdapter(pool_connections=len(AGENT_PORTS), pool_maxsize=64))
+
+@app.route('/<agent_type>/run', methods=['POST'])
 def proxy_to_agent(agent_type):
-    if request.method == 'OPTIONS':
-        # Handle preflight request
-        response = jsonify({'status': 'ok'})
-        response.headers.add('Access-Control-Allow-Origin', '*')
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type')
-        response.headers.add('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        return response
-    
     if agent_type not in AGENT_PORTS:
         return jsonify({'error': 'Invalid agent type'}), 400
     
@@ -37,21 +45,52 @@ def proxy_to_agent(agent_type):
         agent_port = AGENT_PORTS[agent_type]
         agent_url = f"http://localhost:{agent_port}/run"
         
-        response = requests.post(
+        # The request and response bodies are passed through as bytes, without parsing them
+        response = session.post(
             agent_url,
-            json=request.json,
+            data=request.get_data(),
             headers={'Content-Type': 'application/json'}
         )
         
-        # Return the agent's response with CORS headers
-        result = jsonify(response.json())
-        result.headers.add('Access-Control-Allow-Origin', '*')
-        return result
+        # Return the agent's response as is
+        return Response(
+            response.content,
+            status=response.status_code,
+            content_type=response.headers.get('Content-Type', 'application/json')
+        )
         
     except Exception as e:
-        error_response = jsonify({'error': str(e)})
-        error_response.headers.add('Access-Control-Allow-Origin', '*')
-        return error_response, 500
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/<agent_type>/run/stream', methods=['POST'])
+def proxy_stream_to_agent(agent_type):
+    if agent_type not in AGENT_PORTS:
+        return jsonify({'error': 'Invalid agent type'}), 400
+    
+    try:
+        # Forward request to the agent's streaming endpoint without reading the reply up front
+        agent_url = f"http://localhost:{AGENT_PORTS[agent_type]}/run/stream"
+        upstream = session.post(
+            agent_url,
+            data=request.get_data(),
+            headers={'Content-Type': 'application/json'},
+            stream=True
+        )
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    def relay():
+        # Pass each chunk on as it arrives, and hand the connection back to the pool at the end
+        try:
+            yield from upstream.iter_content(None)
+        finally:
+            upstream.close()
+    
+    return Response(
+        relay(),
+        status=upstream.status_code,
+        content_type=upstream.headers.get('Content-Type', 'text/plain')
+    )
 
 @app.route('/health', methods=['GET'])
 def health():
@@ -62,5 +101,8 @@ if __name__ == '__main__':
     print("📡 Proxying requests to ADK agents:")
     for agent, port in AGENT_PORTS.items():
         print(f"   /{agent}/run -> http://localhost:{port}/run")
+        print(f"   /{agent}/run/stream -> http://localhost:{port}/run/stream")
     
-    app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
+    # Direct runs are for local development (run.sh serves the proxy with gunicorn);
+    # serve each request on its own thread so one long agent call does not block the rest
+    app.run(host='0.0.0.0', port=5001, threaded=True)
\ No newline at end of file
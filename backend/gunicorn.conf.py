@@ -0,0 +1,17 @@
+# gunicorn.conf.py - shared Gunicorn settings for the agent servers and CORS proxy (see run.sh)
+import os
+
+# Agent turns mostly wait on Gemini, so concurrency comes from threads, not processes.
+# Each worker is its own process with its own event loop thread, SQLite connections,
+# known-session set and caches, none of which are shared, so the default is one
+# worker per server; raise AGENT_WORKERS only with that in mind.
+workers = int(os.getenv("AGENT_WORKERS", 1))
+worker_class = "gthread"
+threads = int(os.getenv("AGENT_THREADS", 16))
+
+# Agent turns wait on Gemini for a long time, so don't kill a busy worker early
+timeout = int(os.getenv("AGENT_TIMEOUT", 120))
+keepalive = 5
+
+# Not preloaded: the background event loop thread must start in each worker
+preload_app = False
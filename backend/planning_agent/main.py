@@ -1,65 +1,31 @@
-from flask import Flask, request, jsonify
+from flask import Flask
 from flask_cors import CORS
 from .agent import runner
-from google.genai import types
-import asyncio
+from shared.json_provider import OrjsonProvider
+from shared.run_agent import handle_run, handle_run_stream
+from config import init_server
+from shared.sessions import warm_up_session_store
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
 
-# The ADK's session methods are asynchronous, but Flask routes are synchronous.
-# This helper function allows us to call the async methods from our Flask code.
-def run_async(coro):
-    return asyncio.run(coro)
+# Logging and WAL mode for both database files, set up here rather than on import
+init_server()
+
+# Pay the session store's connection and schema setup at boot, not on the first /run
+warm_up_session_store()
 
 @app.route("/run", methods=['POST'])
 def run_agent():
-    
-    data = request.json
-    
-    user_id = data.get("userId")
-    message_data = data.get("newMessage", {})
-    message = message_data.get("text") if isinstance(message_data, dict) else None
-    
-    if not user_id or not message:
-        print("Validation failed: 'userId' or 'newMessage.text' key is missing or invalid in payload.")
-        return jsonify({"error": "Invalid request payload"}), 400
-
-    response_text = ""
-    
-    try:
-        session_id = user_id 
-        
-        # Check if a session already exists in the database for this user.
-        existing_session = run_async(runner.session_service.get_session(
-            app_name=runner.app_name, user_id=user_id, session_id=session_id
-        ))
-
-        # If no session is found, create a new one.
-        if existing_session is None:
-            print(f"No session found for user '{user_id}'. Creating a new one.")
-            new_session = run_async(runner.session_service.create_session(
-                app_name=runner.app_name, user_id=user_id, session_id=session_id
-            ))
-            session_id = new_session.id
-        else:
-            print(f"Found existing session for user '{user_id}'.")
+    return handle_run(runner)
 
-        content = types.Content(
-            role='user',
-            parts=[types.Part.from_text(text=message)]
-        )
-        
-        for event in runner.run(user_id=user_id, session_id=session_id, new_message=content):
-            if event.content and event.content.parts and event.content.parts[0].text:
-                response_text += event.content.parts[0].text
-    
-        return jsonify({"response": response_text})
 
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        return jsonify({"response": f"An internal server error occurred: {e}"}), 500
+@app.route("/run/stream", methods=['POST'])
+def run_agent_stream():
+    return handle_run_stream(runner)
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8001)
+    # Serve each request on its own thread so one long agent call does not block the rest
+    app.run(host="0.0.0.0", port=8001, threaded=True)
 
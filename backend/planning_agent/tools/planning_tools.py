@@ -1,12 +1,5 @@
-import sys
-import os
 from typing import Dict, Any, List
-import json
-
-# Add the parent 'backend' directory to the Python path to find the 'shared' module
-_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-_BACKEND_DIR = os.path.abspath(os.path.join(_SCRIPT_DIR, '..', '..'))
-sys.path.append(_BACKEND_DIR)
+from functools import lru_cache
 
 from shared.db_service import db
 
@@ -16,28 +9,31 @@ def get_assessment_handoff(user_id: str) -> str:
     try:
         handoff = db.get_latest_handoff(user_id, "planning_agent")
         
-        if not handoff:
+        if handoff is None:
             return "No assessment handoff found. User needs to complete assessment first."
         
         message_data = handoff["message_data"]
+        user_profile = message_data.get('user_profile') or {}
         
         handoff_summary = f"""📋 Assessment Complete - Planning Ready!
 
 User Profile:
 • Total assessments: {message_data.get('total_topics_assessed', 0)}
-• Risk tolerance: {message_data.get('user_profile', {}).get('primary_risk_tolerance', 'unknown')}
-• Learning style: {message_data.get('user_profile', {}).get('primary_learning_style', 'unknown')}
+• Risk tolerance: {user_profile.get('primary_risk_tolerance', 'unknown')}
+• Learning style: {user_profile.get('primary_learning_style', 'unknown')}
 
 
 Knowledge Areas:"""
         
-        for area in message_data.get('user_profile', {}).get('knowledge_areas', []):
-            handoff_summary += f"\n• {area['topic'].replace('_', ' ').title()}: {area['level']}"
+        # Collect the pieces and join once rather than growing the string line by line
+        lines = [handoff_summary]
+        for area in user_profile.get('knowledge_areas') or ():
+            lines.append(f"\n• {area['topic'].replace('_', ' ').title()}: {area['level']}")
         
-        handoff_summary += f"\n\nReceived from: {handoff['from_agent']}"
-        handoff_summary += f"\nTimestamp: {handoff['created_at'][:19]}"
+        lines.append(f"\n\nReceived from: {handoff['from_agent']}")
+        lines.append(f"\nTimestamp: {handoff['created_at'][:19]}")
         
-        return handoff_summary
+        return "".join(lines)
         
     except Exception as e:
         return f"Error retrieving assessment handoff: {str(e)}"
@@ -99,12 +95,13 @@ def create_learning_path(user_id: str) -> dict[str, Any]:
             learning_modules.append(module)
         
         # Create learning path data structure
+        module_count = len(learning_modules)
         learning_path = {
             "user_id": user_id,
             "risk_tolerance": primary_risk_tolerance,
             "learning_style": primary_learning_style,
-            "total_modules": len(learning_modules),
-            "estimated_duration": f"{len(learning_modules) * 2}-{len(learning_modules) * 3} hours",
+            "total_modules": module_count,
+            "estimated_duration": f"{module_count * 2}-{module_count * 3} hours",
             "modules": learning_modules,
             "created_by": "planning_agent"
         }
@@ -120,6 +117,108 @@ def create_learning_path(user_id: str) -> dict[str, Any]:
     except Exception as e:
         return f"Error creating learning path: {str(e)}"
 
+# Module definitions by topic and level
+_MODULE_TEMPLATES = {
+    "investment_basics": {
+        "beginner": {
+            "title": "Investment Fundamentals",
+            "duration": "2-3 hours",
+            "content": ["What are stocks, bonds, and ETFs", "Risk vs. return basics", "Getting started with investing"]
+        },
+        "intermediate": {
+            "title": "Investment Strategies",
+            "duration": "1-2 hours", 
+            "content": ["Portfolio diversification", "Asset allocation", "Dollar-cost averaging"]
+        },
+        "advanced": {
+            "title": "Advanced Investment Analysis",
+            "duration": "1 hour",
+            "content": ["Financial statement analysis", "Valuation methods", "Advanced portfolio optimization"]
+        }
+    },
+    "risk_management": {
+        "beginner": {
+            "title": "Understanding Investment Risk",
+            "duration": "2 hours",
+            "content": ["Types of investment risk", "Risk tolerance assessment", "Basic diversification"]
+        },
+        "intermediate": {
+            "title": "Portfolio Risk Management", 
+            "duration": "1.5 hours",
+            "content": ["Asset correlation", "Risk-adjusted returns", "Rebalancing strategies"]
+        },
+        "advanced": {
+            "title": "Advanced Risk Strategies",
+            "duration": "1 hour",
+            "content": ["Hedging techniques", "Options strategies", "Risk modeling"]
+        }
+    },
+    "retirement_planning": {
+        "beginner": {
+            "title": "Retirement Planning Basics",
+            "duration": "2.5 hours",
+            "content": ["401k fundamentals", "IRA types", "Employer matching"]
+        },
+        "intermediate": {
+            "title": "Retirement Optimization",
+            "duration": "2 hours",
+            "content": ["Tax-advantaged strategies", "Rollover planning", "Social Security timing"]
+        },
+        "advanced": {
+            "title": "Advanced Retirement Strategies",
+            "duration": "1.5 hours",
+            "content": ["Roth conversions", "Estate planning", "Tax-loss harvesting"]
+        }
+    },
+    "budgeting": {
+        "beginner": {
+            "title": "Personal Budgeting Fundamentals",
+            "duration": "2 hours",
+            "content": ["Income tracking", "Expense categorization", "Emergency fund basics"]
+        },
+        "intermediate": {
+            "title": "Advanced Budgeting Strategies",
+            "duration": "1.5 hours",
+            "content": ["Zero-based budgeting", "Savings automation", "Debt management"]
+        },
+        "advanced": {
+            "title": "Financial Planning Integration",
+            "duration": "1 hour",
+            "content": ["Cash flow optimization", "Tax planning", "Investment coordination"]
+        }
+    },
+    "financial_goals": {
+        "beginner": {
+            "title": "Setting Financial Goals",
+            "duration": "1.5 hours",
+            "content": ["SMART goal setting", "Short vs. long-term goals", "Priority planning"]
+        },
+        "intermediate": {
+            "title": "Goal Achievement Strategies",
+            "duration": "1 hour",
+            "content": ["Timeline planning", "Progress tracking", "Adjustment strategies"]
+        },
+        "advanced": {
+            "title": "Strategic Financial Planning",
+            "duration": "45 minutes",
+            "content": ["Multi-goal optimization", "Scenario planning", "Legacy planning"]
+        }
+    }
+}
+
+# Module activities by learning style, and the focus note by risk tolerance
+_STYLE_ACTIVITIES = {
+    "visual": ["Interactive charts and graphs", "Video explanations", "Infographic summaries"],
+    "hands-on": ["Practice exercises", "Mock portfolio building", "Interactive simulations"]
+}
+_DEFAULT_ACTIVITIES = ["Detailed reading materials", "Case studies", "Analysis worksheets"]
+
+_RISK_NOTES = {
+    "conservative": "Focus on low-risk, stable investment options",
+    "aggressive": "Include higher-risk, higher-reward strategies"
+}
+_DEFAULT_RISK_NOTE = "Balanced approach with moderate risk strategies"
+
 def create_module_for_topic(topic: str, level: str, learning_style: str, risk_tolerance: str) -> Dict[str, Any]:
     """Creates a learning module for a specific topic and knowledge level.
 
@@ -132,120 +231,31 @@ def create_module_for_topic(topic: str, level: str, learning_style: str, risk_to
     Returns:
         dict: Learning module with title, content, duration, and activities.
     """
-    
-    # Module definitions by topic and level
-    module_templates = {
-        "investment_basics": {
-            "beginner": {
-                "title": "Investment Fundamentals",
-                "duration": "2-3 hours",
-                "content": ["What are stocks, bonds, and ETFs", "Risk vs. return basics", "Getting started with investing"]
-            },
-            "intermediate": {
-                "title": "Investment Strategies",
-                "duration": "1-2 hours", 
-                "content": ["Portfolio diversification", "Asset allocation", "Dollar-cost averaging"]
-            },
-            "advanced": {
-                "title": "Advanced Investment Analysis",
-                "duration": "1 hour",
-                "content": ["Financial statement analysis", "Valuation methods", "Advanced portfolio optimization"]
-            }
-        },
-        "risk_management": {
-            "beginner": {
-                "title": "Understanding Investment Risk",
-                "duration": "2 hours",
-                "content": ["Types of investment risk", "Risk tolerance assessment", "Basic diversification"]
-            },
-            "intermediate": {
-                "title": "Portfolio Risk Management", 
-                "duration": "1.5 hours",
-                "content": ["Asset correlation", "Risk-adjusted returns", "Rebalancing strategies"]
-            },
-            "advanced": {
-                "title": "Advanced Risk Strategies",
-                "duration": "1 hour",
-                "content": ["Hedging techniques", "Options strategies", "Risk modeling"]
-            }
-        },
-        "retirement_planning": {
-            "beginner": {
-                "title": "Retirement Planning Basics",
-                "duration": "2.5 hours",
-                "content": ["401k fundamentals", "IRA types", "Employer matching"]
-            },
-            "intermediate": {
-                "title": "Retirement Optimization",
-                "duration": "2 hours",
-                "content": ["Tax-advantaged strategies", "Rollover planning", "Social Security timing"]
-            },
-            "advanced": {
-                "title": "Advanced Retirement Strategies",
-                "duration": "1.5 hours",
-                "content": ["Roth conversions", "Estate planning", "Tax-loss harvesting"]
-            }
-        },
-        "budgeting": {
-            "beginner": {
-                "title": "Personal Budgeting Fundamentals",
-                "duration": "2 hours",
-                "content": ["Income tracking", "Expense categorization", "Emergency fund basics"]
-            },
-            "intermediate": {
-                "title": "Advanced Budgeting Strategies",
-                "duration": "1.5 hours",
-                "content": ["Zero-based budgeting", "Savings automation", "Debt management"]
-            },
-            "advanced": {
-                "title": "Financial Planning Integration",
-                "duration": "1 hour",
-                "content": ["Cash flow optimization", "Tax planning", "Investment coordination"]
-            }
-        },
-        "financial_goals": {
-            "beginner": {
-                "title": "Setting Financial Goals",
-                "duration": "1.5 hours",
-                "content": ["SMART goal setting", "Short vs. long-term goals", "Priority planning"]
-            },
-            "intermediate": {
-                "title": "Goal Achievement Strategies",
-                "duration": "1 hour",
-                "content": ["Timeline planning", "Progress tracking", "Adjustment strategies"]
-            },
-            "advanced": {
-                "title": "Strategic Financial Planning",
-                "duration": "45 minutes",
-                "content": ["Multi-goal optimization", "Scenario planning", "Legacy planning"]
-            }
-        }
+    # Modules come from a small, fixed set of inputs, so build each combination once and
+    # hand out copies so callers can't modify the cached module
+    module = _module_for_topic(topic, level, learning_style, risk_tolerance)
+    return {
+        **module,
+        "content_areas": list(module["content_areas"]),
+        "activities": list(module["activities"])
     }
+
+@lru_cache(maxsize=256)
+def _module_for_topic(topic: str, level: str, learning_style: str, risk_tolerance: str) -> Dict[str, Any]:
+    """Builds the learning module for a topic, level, learning style and risk tolerance"""
     
     # Get base module template
-    base_module = module_templates.get(topic, {}).get(level, {
+    base_module = _MODULE_TEMPLATES.get(topic, {}).get(level, {
         "title": f"{topic.replace('_', ' ').title()} - {level.title()}",
         "duration": "1 hour",
         "content": ["Custom content for this topic"]
     })
     
     # Customize based on learning style and risk tolerance
-    activities = []
-    if learning_style == "visual":
-        activities = ["Interactive charts and graphs", "Video explanations", "Infographic summaries"]
-    elif learning_style == "hands-on":
-        activities = ["Practice exercises", "Mock portfolio building", "Interactive simulations"]
-    else:
-        activities = ["Detailed reading materials", "Case studies", "Analysis worksheets"]
+    activities = _STYLE_ACTIVITIES.get(learning_style, _DEFAULT_ACTIVITIES)
     
     # Adjust content based on risk tolerance
-    risk_note = ""
-    if risk_tolerance == "conservative":
-        risk_note = "Focus on low-risk, stable investment options"
-    elif risk_tolerance == "aggressive":
-        risk_note = "Include higher-risk, higher-reward strategies"
-    else:
-        risk_note = "Balanced approach with moderate risk strategies"
+    risk_note = _RISK_NOTES.get(risk_tolerance, _DEFAULT_RISK_NOTE)
     
     return {
         "topic": topic,
@@ -268,9 +278,9 @@ def get_user_learning_path(user_id: str) -> str:
         str: Formatted learning path details or message if no path exists.
     """
     try:
-        learning_path = db.get_user_learning_path(user_id)
+        learning_path = db.get_cached_learning_path(user_id)
         
-        if not learning_path:
+        if learning_path is None:
             return "No learning path found. Create a learning path first using create_learning_path."
         
         path_data = learning_path["path_data"]
@@ -285,13 +295,14 @@ Profile:
 
 Modules:"""
         
-        for i, module in enumerate(path_data.get('modules', []), 1):
-            response += f"\n{i}. {module.get('title', 'Unknown')} ({module.get('difficulty', 'unknown')}) - {module.get('duration', 'unknown')}"
+        lines = [response]
+        for i, module in enumerate(path_data.get('modules') or (), 1):
+            lines.append(f"\n{i}. {module.get('title', 'Unknown')} ({module.get('difficulty', 'unknown')}) - {module.get('duration', 'unknown')}")
         
-        response += f"\n\nCreated: {learning_path['created_at'][:19]}"
-        response += f"\nBy: {learning_path['created_by_agent']}"
+        lines.append(f"\n\nCreated: {learning_path['created_at'][:19]}")
+        lines.append(f"\nBy: {learning_path['created_by_agent']}")
         
-        return response
+        return "".join(lines)
         
     except Exception as e:
         return f"Error retrieving learning path: {str(e)}"
@@ -308,18 +319,20 @@ def prepare_progress_handoff(user_id: str, message: str) -> str:
     """
     try:
         # Get learning path
-        learning_path = db.get_user_learning_path(user_id)
+        learning_path = db.get_cached_learning_path(user_id)
         
-        if not learning_path:
+        if learning_path is None:
             return "Cannot prepare handoff - no learning path exists for user."
         
+        path_data = learning_path["path_data"]
+        
         # Prepare handoff data
         handoff_data = {
             "user_id": user_id,
             "learning_path_ready": True,
-            "learning_path": learning_path["path_data"],
+            "learning_path": path_data,
             "handoff_message": message,
-            "modules_ready": len(learning_path["path_data"].get("modules", [])),
+            "modules_ready": len(path_data.get("modules") or ()),
             "next_agent": "progress_agent",
             "planning_complete": True
         }
@@ -338,7 +351,7 @@ def prepare_progress_handoff(user_id: str, message: str) -> str:
 Handoff Summary:
 • User: {user_id}
 • Learning modules ready: {handoff_data['modules_ready']}
-• Learning path: {learning_path['path_data'].get('total_modules', 0)} modules
+• Learning path: {path_data.get('total_modules', 0)} modules
 • Message: {message}
 
 ✅ Progress agent can now begin tracking user's learning journey!"""
@@ -358,7 +371,7 @@ def get_database_info(user_id: str) -> str:
         str: Formatted database statistics and planning-specific data.
     """
     try:
-        stats = db.get_database_stats()
+        stats = db.get_cached_database_stats()
         
         # Get user-specific data
         learning_path = db.get_user_learning_path(user_id)
@@ -374,7 +387,7 @@ System Statistics:
 
 User Data:
 • Your assessments: {len(user_assessments)}
-• Learning path exists: {'Yes' if learning_path else 'No'}
+• Learning path exists: {'Yes' if learning_path is not None else 'No'}
 • Database: financial_literacy.db"""
         
     except Exception as e:
@@ -1,98 +1,134 @@
-import sys
-import os
 from typing import Dict, Any, List
-import json
-
-# Add the parent 'backend' directory to the Python path to find the 'shared' module
-_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-_BACKEND_DIR = os.path.abspath(os.path.join(_SCRIPT_DIR, '..', '..'))
-sys.path.append(_BACKEND_DIR)
+from dataclasses import dataclass
+from functools import lru_cache
 
 from shared.db_service import db
+from shared.json_utils import dumps
+
+# Score thresholds, highest first, used to grade saved progress and completed modules
+_PERFORMANCE_LEVELS = {
+    90: {"level": "Excellent", "feedback": "Outstanding work! You've mastered this concept."},
+    80: {"level": "Good", "feedback": "Great job! You have a solid understanding."},
+    70: {"level": "Satisfactory", "feedback": "Good progress! Consider reviewing the key concepts."},
+    60: {"level": "Needs Improvement", "feedback": "You're getting there! Additional practice recommended."},
+    0: {"level": "Requires Review", "feedback": "Let's review this material together before moving forward."}
+}
+
+_CERTIFICATES = {
+    90: "Gold Certificate",
+    80: "Silver Certificate",
+    70: "Bronze Certificate",
+    0: "Completion Certificate"
+}
+
+# Progress rows store modules as "module_<n>"; slicing off the prefix avoids a replace() per row
+_MODULE_PREFIX_LEN = len("module_")
+
+@dataclass(slots=True)
+class ModuleSummary:
+    """One module of a user's learning path, as listed by get_learning_modules"""
+    name: str
+    progress: int
+    status: str
+    topic: str
+    difficulty: str
+    duration: str
+    module_number: int
+    last_score: int
+    last_accessed: str
+    description: str
+
+@lru_cache(maxsize=64)
+def _module_description(topic: str) -> str:
+    """Returns the one-line description shown for a module, built once per topic"""
+    return f"Learn essential {topic.replace('_', ' ')} concepts"
+
+def _learning_modules_data(user_id: str, learning_path: Dict[str, Any], progress_data: List) -> Dict[str, Any]:
+    """Builds the learning modules payload from a user's learning path and progress rows"""
+    # Create progress lookup
+    progress_lookup = {}
+    if progress_data:
+        for module_id, step_number, score, completed_at in progress_data:
+            module_num = int(module_id[_MODULE_PREFIX_LEN:])
+            progress_lookup[module_num] = {
+                "step": step_number,
+                "score": score,
+                "completed_at": completed_at
+            }
+    
+    # Build modules array
+    modules = []
+    path_data = learning_path["path_data"]
+    path_modules = path_data.get("modules") or ()
+    
+    for i, module_data in enumerate(path_modules, 1):
+        progress_info = progress_lookup.get(i, {"step": 0, "score": 0})
+        
+        # Determine status and progress
+        if progress_info["step"] >= 100:
+            status = "completed"
+            progress = 100
+        elif progress_info["step"] > 0:
+            status = "in-progress"
+            progress = progress_info["step"]
+        else:
+            status = "upcoming"
+            progress = 0
+        
+        module = ModuleSummary(
+            name=module_data.get("title", f"Module {i}"),
+            progress=progress,
+            status=status,
+            topic=module_data.get("topic", "financial_literacy"),
+            difficulty=module_data.get("difficulty", "beginner"),
+            duration=module_data.get("duration", "2-3 hours"),
+            module_number=i,
+            last_score=progress_info["score"],
+            last_accessed=progress_info.get("completed_at", ""),
+            description=_module_description(module_data.get("topic", "financial"))
+        )
+        modules.append(module)
+    
+    # Calculate overall statistics
+    completed_count = sum(1 for m in modules if m.status == "completed")
+    in_progress_count = sum(1 for m in modules if m.status == "in-progress")
+    total_modules = len(modules)
+    overall_progress = round((completed_count / total_modules * 100)) if total_modules > 0 else 0
+    
+    return {
+        "modules": modules,
+        "total_modules": total_modules,
+        "completed_count": completed_count,
+        "in_progress_count": in_progress_count,
+        "upcoming_count": total_modules - completed_count - in_progress_count,
+        "overall_progress": overall_progress,
+        "user_id": user_id,
+        "learning_style": path_data.get("learning_style", "analytical"),
+        "risk_tolerance": path_data.get("risk_tolerance", "moderate")
+    }
 
 def get_learning_modules(user_id: str) -> str:
     """Returns structured learning modules data with progress and status."""
     try:
-        # Get user's learning path
-        learning_path = db.get_user_learning_path(user_id)
-        if not learning_path:
-            return json.dumps({
+        # Get user's learning path and progress data
+        learning_path, progress_data = db.get_user_state(user_id)
+        if learning_path is None:
+            return dumps({
                 "status": "error",
                 "message": "No learning path found. Complete assessment first.",
                 "data": None
             })
         
-        # Get user's progress data
-        progress_data = db.get_user_progress(user_id)
-        
-        # Create progress lookup
-        progress_lookup = {}
-        if progress_data:
-            for module_id, step_number, score, completed_at in progress_data:
-                module_num = int(module_id.replace("module_", ""))
-                progress_lookup[module_num] = {
-                    "step": step_number,
-                    "score": score,
-                    "completed_at": completed_at
-                }
-        
-        # Build modules array
-        modules = []
-        path_modules = learning_path["path_data"].get("modules", [])
-        
-        for i, module_data in enumerate(path_modules, 1):
-            progress_info = progress_lookup.get(i, {"step": 0, "score": 0})
-            
-            # Determine status and progress
-            if progress_info["step"] >= 100:
-                status = "completed"
-                progress = 100
-            elif progress_info["step"] > 0:
-                status = "in-progress"
-                progress = progress_info["step"]
-            else:
-                status = "upcoming"
-                progress = 0
-            
-            module = {
-                "name": module_data.get("title", f"Module {i}"),
-                "progress": progress,
-                "status": status,
-                "topic": module_data.get("topic", "financial_literacy"),
-                "difficulty": module_data.get("difficulty", "beginner"),
-                "duration": module_data.get("duration", "2-3 hours"),
-                "module_number": i,
-                "last_score": progress_info["score"],
-                "last_accessed": progress_info.get("completed_at", ""),
-                "description": f"Learn essential {module_data.get('topic', 'financial').replace('_', ' ')} concepts"
-            }
-            modules.append(module)
-        
-        # Calculate overall statistics
-        completed_count = sum(1 for m in modules if m["status"] == "completed")
-        in_progress_count = sum(1 for m in modules if m["status"] == "in-progress")
-        total_modules = len(modules)
-        overall_progress = round((completed_count / total_modules * 100)) if total_modules > 0 else 0
-        
         response_data = {
             "status": "success",
-            "data": {
-                "modules": modules,
-                "total_modules": total_modules,
-                "completed_count": completed_count,
-                "in_progress_count": in_progress_count,
-                "upcoming_count": total_modules - completed_count - in_progress_count,
-                "overall_progress": overall_progress,
-                "user_id": user_id,
-                "learning_style": learning_path["path_data"].get("learning_style", "analytical"),
-                "risk_tolerance": learning_path["path_data"].get("risk_tolerance", "moderate")
-            }
+            "data": _learning_modules_data(user_id, learning_path, progress_data)
         }
         
-        return json.dumps(response_data)
+        # orjson serializes the ModuleSummary dataclasses directly, in field order
+        return dumps(response_data)
         
     except Exception as e:
-        return json.dumps({
+        return dumps({
             "status": "error",
             "message": f"Error retrieving learning modules: {str(e)}",
             "data": None
@@ -101,55 +137,39 @@ def get_learning_modules(user_id: str) -> str:
 def get_dashboard_stats(user_id: str) -> str:
     """Returns comprehensive dashboard statistics as JSON."""
     try:
-        # Get learning modules data first
-        modules_response = get_learning_modules(user_id)
-        modules_data = json.loads(modules_response)
+        # Build the module stats in-process from one read rather than parsing get_learning_modules' JSON
+        learning_path, progress_data = db.get_user_state(user_id)
         
-        if modules_data["status"] != "success":
-            return json.dumps({
+        if learning_path is None:
+            return dumps({
                 "status": "error",
                 "message": "Cannot generate stats without learning modules",
                 "data": None
             })
         
-        module_stats = modules_data["data"]
-        
-        # Get additional stats
-        progress_data = db.get_user_progress(user_id)
-        learning_path = db.get_user_learning_path(user_id)
+        module_stats = _learning_modules_data(user_id, learning_path, progress_data)
         
         # Calculate learning streak
-        learning_streak = 0
-        if progress_data:
-            # Simple streak calculation based on recent activity
-            recent_entries = sorted(progress_data, key=lambda x: x[3], reverse=True)[:7]
-            learning_streak = len(recent_entries)
+        # Simple streak calculation based on recent activity (up to the last 7 entries)
+        learning_streak = min(len(progress_data), 7)
         
         # Calculate time spent (estimated)
         estimated_time_spent = 0
         for module in module_stats["modules"]:
-            if module["status"] == "completed":
+            if module.status == "completed":
                 estimated_time_spent += 2.5  # Average 2.5 hours per completed module
-            elif module["status"] == "in-progress":
-                estimated_time_spent += (module["progress"] / 100) * 2.5
-        
-        # Get next module recommendation
-        next_module = None
-        for module in module_stats["modules"]:
-            if module["status"] == "in-progress":
-                next_module = {
-                    "name": module["name"],
-                    "module_number": module["module_number"],
-                    "progress": module["progress"]
-                }
-                break
-            elif module["status"] == "upcoming":
-                next_module = {
-                    "name": module["name"],
-                    "module_number": module["module_number"],
-                    "progress": 0
-                }
-                break
+            elif module.status == "in-progress":
+                estimated_time_spent += (module.progress / 100) * 2.5
+        
+        # Get next module recommendation: the first module that isn't completed yet
+        # (upcoming modules already report 0 progress)
+        next_module = next((m for m in module_stats["modules"] if m.status != "completed"), None)
+        if next_module:
+            next_module = {
+                "name": next_module.name,
+                "module_number": next_module.module_number,
+                "progress": next_module.progress
+            }
         
         response_data = {
             "status": "success",
@@ -164,14 +184,14 @@ def get_dashboard_stats(user_id: str) -> str:
                 "next_module": next_module,
                 "learning_style": module_stats["learning_style"],
                 "risk_tolerance": module_stats["risk_tolerance"],
-                "last_activity": progress_data[-1][3] if progress_data else None
+                "last_activity": max(row[3] for row in progress_data) if progress_data else None
             }
         }
         
-        return json.dumps(response_data)
+        return dumps(response_data)
         
     except Exception as e:
-        return json.dumps({
+        return dumps({
             "status": "error",
             "message": f"Error generating dashboard stats: {str(e)}",
             "data": None
@@ -181,21 +201,22 @@ def start_learning_module(user_id: str, module_number: int) -> str:
     """Starts a learning module and returns structured response."""
     try:
         # Get user's learning path
-        learning_path = db.get_user_learning_path(user_id)
+        learning_path = db.get_cached_learning_path(user_id)
         
-        if not learning_path:
-            return json.dumps({
+        if learning_path is None:
+            return dumps({
                 "status": "error",
                 "message": "No learning path found. Complete assessment first.",
                 "data": None
             })
         
-        modules = learning_path["path_data"].get("modules", [])
+        modules = learning_path["path_data"].get("modules") or ()
+        total_modules = len(modules)
         
-        if module_number < 1 or module_number > len(modules):
-            return json.dumps({
+        if not 1 <= module_number <= total_modules:
+            return dumps({
                 "status": "error",
-                "message": f"Invalid module number. Available modules: 1-{len(modules)}",
+                "message": f"Invalid module number. Available modules: 1-{total_modules}",
                 "data": None
             })
         
@@ -223,16 +244,16 @@ def start_learning_module(user_id: str, module_number: int) -> str:
                 }
             }
             
-            return json.dumps(response_data)
+            return dumps(response_data)
         else:
-            return json.dumps({
+            return dumps({
                 "status": "error",
                 "message": "Error saving module start progress",
                 "data": None
             })
         
     except Exception as e:
-        return json.dumps({
+        return dumps({
             "status": "error",
             "message": f"Error starting learning module: {str(e)}",
             "data": None
@@ -243,14 +264,14 @@ def save_progress(user_id: str, module_number: int, step_number: int, score: int
     try:
         # Validate inputs
         if step_number < 0 or step_number > 100:
-            return json.dumps({
+            return dumps({
                 "status": "error",
                 "message": "Step number must be between 0-100 (percentage complete)",
                 "data": None
             })
         
         if score < 0 or score > 100:
-            return json.dumps({
+            return dumps({
                 "status": "error",
                 "message": "Score must be between 0-100",
                 "data": None
@@ -261,15 +282,7 @@ def save_progress(user_id: str, module_number: int, step_number: int, score: int
         
         if success:
             # Determine performance level
-            performance_levels = {
-                90: {"level": "Excellent", "feedback": "Outstanding work! You've mastered this concept."},
-                80: {"level": "Good", "feedback": "Great job! You have a solid understanding."},
-                70: {"level": "Satisfactory", "feedback": "Good progress! Consider reviewing the key concepts."},
-                60: {"level": "Needs Improvement", "feedback": "You're getting there! Additional practice recommended."},
-                0: {"level": "Requires Review", "feedback": "Let's review this material together before moving forward."}
-            }
-            
-            performance = next(perf for threshold, perf in performance_levels.items() if score >= threshold)
+            performance = next(perf for threshold, perf in _PERFORMANCE_LEVELS.items() if score >= threshold)
             
             response_data = {
                 "status": "success",
@@ -286,16 +299,16 @@ def save_progress(user_id: str, module_number: int, step_number: int, score: int
                 }
             }
             
-            return json.dumps(response_data)
+            return dumps(response_data)
         else:
-            return json.dumps({
+            return dumps({
                 "status": "error",
                 "message": "Error saving progress to database",
                 "data": None
             })
         
     except Exception as e:
-        return json.dumps({
+        return dumps({
             "status": "error",
             "message": f"Error saving progress: {str(e)}",
             "data": None
@@ -308,32 +321,25 @@ def complete_module(user_id: str, module_number: int, final_score: int) -> str:
         success = db.save_progress(user_id, f"module_{module_number}", 100, final_score)
         
         if not success:
-            return json.dumps({
+            return dumps({
                 "status": "error",
                 "message": "Error saving module completion",
                 "data": None
             })
         
         # Get learning path for context
-        learning_path = db.get_user_learning_path(user_id)
+        learning_path = db.get_cached_learning_path(user_id)
         total_modules = 0
         module_title = f"Module {module_number}"
         
-        if learning_path:
-            modules = learning_path["path_data"].get("modules", [])
+        if learning_path is not None:
+            modules = learning_path["path_data"].get("modules") or ()
             total_modules = len(modules)
-            if module_number <= len(modules):
+            if 1 <= module_number <= total_modules:
                 module_title = modules[module_number - 1].get("title", f"Module {module_number}")
         
         # Determine certificate level
-        certificates = {
-            90: "Gold Certificate",
-            80: "Silver Certificate", 
-            70: "Bronze Certificate",
-            0: "Completion Certificate"
-        }
-        
-        certificate = next(cert for threshold, cert in certificates.items() if final_score >= threshold)
+        certificate = next(cert for threshold, cert in _CERTIFICATES.items() if final_score >= threshold)
         
         # Check overall progress
         progress_data = db.get_user_progress(user_id)
@@ -371,10 +377,10 @@ def complete_module(user_id: str, module_number: int, final_score: int) -> str:
             }
         }
         
-        return json.dumps(response_data)
+        return dumps(response_data)
         
     except Exception as e:
-        return json.dumps({
+        return dumps({
             "status": "error",
             "message": f"Error completing module: {str(e)}",
             "data": None
@@ -387,22 +393,22 @@ def get_user_progress(user_id: str) -> str:
         progress_data = db.get_user_progress(user_id)
         
         if not progress_data:
-            return json.dumps({
+            return dumps({
                 "status": "error",
                 "message": "No learning progress found. Start a learning module first.",
                 "data": None
             })
         
         # Get learning path for context
-        learning_path = db.get_user_learning_path(user_id)
+        learning_path = db.get_cached_learning_path(user_id)
         total_modules = 0
-        if learning_path:
+        if learning_path is not None:
             total_modules = learning_path["path_data"].get("total_modules", 0)
         
         # Organize progress by module
         module_progress = {}
         for module_id, step_number, score, completed_at in progress_data:
-            module_num = int(module_id.replace("module_", ""))
+            module_num = int(module_id[_MODULE_PREFIX_LEN:])
             if module_num not in module_progress:
                 module_progress[module_num] = []
             module_progress[module_num].append({
@@ -448,10 +454,10 @@ def get_user_progress(user_id: str) -> str:
             }
         }
         
-        return json.dumps(response_data)
+        return dumps(response_data)
         
     except Exception as e:
-        return json.dumps({
+        return dumps({
             "status": "error",
             "message": f"Error retrieving progress: {str(e)}",
             "data": None
@@ -463,7 +469,7 @@ def get_planning_handoff(user_id: str) -> str:
     try:
         handoff = db.get_latest_handoff(user_id, "progress_agent")
         
-        if not handoff:
+        if handoff is None:
             return "No learning path handoff found. User needs to complete planning phase first."
         
         message_data = handoff["message_data"]
@@ -479,13 +485,15 @@ Learning Plan Summary:
 
 Available Modules:"""
         
-        for i, module in enumerate(learning_path.get('modules', []), 1):
-            handoff_summary += f"\n{i}. {module.get('title', 'Unknown')} ({module.get('difficulty', 'unknown')}) - {module.get('duration', 'unknown')}"
+        # One join at the end instead of re-copying the summary for every module line
+        lines = [handoff_summary]
+        for i, module in enumerate(learning_path.get('modules') or (), 1):
+            lines.append(f"\n{i}. {module.get('title', 'Unknown')} ({module.get('difficulty', 'unknown')}) - {module.get('duration', 'unknown')}")
         
-        handoff_summary += f"\n\nReceived from: {handoff['from_agent']}"
-        handoff_summary += f"\nTimestamp: {handoff['created_at'][:19]}"
+        lines.append(f"\n\nReceived from: {handoff['from_agent']}")
+        lines.append(f"\nTimestamp: {handoff['created_at'][:19]}")
         
-        return handoff_summary
+        return "".join(lines)
         
     except Exception as e:
         return f"Error retrieving planning handoff: {str(e)}"
@@ -493,11 +501,10 @@ Available Modules:"""
 def get_database_info(user_id: str) -> str:
     """Retrieves database statistics and progress agent specific information for debugging."""
     try:
-        stats = db.get_database_stats()
+        stats = db.get_cached_database_stats()
         
         # Get user-specific data
-        progress_data = db.get_user_progress(user_id)
-        learning_path = db.get_user_learning_path(user_id)
+        learning_path, progress_data = db.get_user_state(user_id)
         
         return f"""📊 Progress Agent Database Info:
 
@@ -509,7 +516,7 @@ System Statistics:
 
 User Progress Data:
 • Your progress entries: {len(progress_data)}
-• Learning path exists: {'Yes' if learning_path else 'No'}
+• Learning path exists: {'Yes' if learning_path is not None else 'No'}
 • Database: financial_literacy.db"""
         
     except Exception as e:
@@ -5,22 +5,22 @@ export PYTHONPATH=.
 
 # Start the assessment agent
 echo "Starting Assessment Agent on port 8000..."
-export FLASK_APP=assessment_agent.main
-flask run --no-reload -h 0.0.0.0 -p 8000 &
+gunicorn -c gunicorn.conf.py -b 0.0.0.0:8000 assessment_agent.main:app &
 
 # Start the planning agent
 echo "Starting Planning Agent on port 8001..."
-export FLASK_APP=planning_agent.main
-flask run --no-reload -h 0.0.0.0 -p 8001 &
+gunicorn -c gunicorn.conf.py -b 0.0.0.0:8001 planning_agent.main:app &
 
 # Start the progress agent
 echo "Starting Progress Agent on port 8002..."
-export FLASK_APP=progress_agent.main
-flask run --no-reload -h 0.0.0.0 -p 8002 &
+gunicorn -c gunicorn.conf.py -b 0.0.0.0:8002 progress_agent.main:app &
 
 # Start the content delivery agent
 echo "Starting Content Delivery Agent on port 8003..."
-export FLASK_APP=content_delivery_agent.main
-flask run --no-reload -h 0.0.0.0 -p 8003 &
+gunicorn -c gunicorn.conf.py -b 0.0.0.0:8003 content_delivery_agent.main:app &
+
+# Start the CORS proxy the frontend talks to
+echo "Starting CORS proxy on port 5001..."
+gunicorn -c gunicorn.conf.py -b 0.0.0.0:5001 cors_wrapper:app &
 
 echo "All agents are running."
@@ -1,112 +1,180 @@
 # db_service.py
+import queue
 import sqlite3
-import json
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Dict, Any, List, Optional, Tuple
 import os
 
+from cachetools import TTLCache
+
+from config import SQLITE_PRAGMAS
+from shared.json_utils import dumps, loads
+
 _SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 _DB_PATH = os.path.join(_SCRIPT_DIR, '..', 'financial_literacy.db')
 
+# Learning paths are written by the planning agent, in another process, so a cached path
+# is only reused while its id is still the user's latest (one indexed MAX(id) lookup).
+# Only found paths are cached, so a user who has just finished their assessment is never
+# served a stale "no path"; the TTL just bounds how long idle entries stay in memory.
+_LEARNING_PATH_TTL_SECONDS = 300.0
+
+# The database-wide counts are display-only, so they are reused for a minute. Writes
+# come from other agents and other workers, and only drop this process's copy, so
+# per-user rows that tools check or read back are always read fresh.
+_STATS_TTL_SECONDS = 60.0
+_MISSING = object()
+
+# Idle connections kept open for reuse. ADK runs every agent turn on a new thread, so
+# connections are lent per call from this pool rather than held per thread; a burst
+# beyond it opens extra connections and closes them when they come back.
+_POOL_SIZE = 8
+
 
 class DatabaseService:
     """Shared database service for all financial literacy agents"""
 
     def __init__(self, db_path: str = _DB_PATH): 
         self.db_path = db_path
+        self._pool = queue.LifoQueue(maxsize=_POOL_SIZE)
+        self._path_cache = TTLCache(maxsize=10_000, ttl=_LEARNING_PATH_TTL_SECONDS)
+        self._stats_cache = TTLCache(maxsize=1, ttl=_STATS_TTL_SECONDS)
+        self._cache_lock = threading.Lock()
         self.init_database()
     
+    def _open(self) -> sqlite3.Connection:
+        """Open and configure a new connection"""
+        # Autocommit mode: every statement commits by itself, so a call that fails
+        # halfway can never leave a transaction open on a pooled connection.
+        # Connections move between threads through the pool, one user at a time.
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    @contextmanager
+    def _connection(self):
+        """Lend a pooled connection for the block, opening a new one when the pool is empty"""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        try:
+            yield conn
+        finally:
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+    
+    def _cached_read(self, cache: TTLCache, key, read):
+        """Return cache[key], calling read(key) and storing its result on a miss"""
+        with self._cache_lock:
+            value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = read(key)
+            with self._cache_lock:
+                cache[key] = value
+        return value
+    
+    def _stats_changed(self):
+        """Drop this process's cached stats after a write"""
+        with self._cache_lock:
+            self._stats_cache.clear()
+    
     def init_database(self):
         """Initialize all required tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id TEXT PRIMARY KEY,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # ADK Sessions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS adk_sessions (
-                session_id TEXT PRIMARY KEY,
-                user_id TEXT,
-                data TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Financial assessments table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS assessments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT,
-                topic TEXT,
-                user_response TEXT,
-                knowledge_level TEXT,
-                risk_tolerance TEXT,
-                learning_style TEXT,
-                confidence_score REAL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # Learning paths table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS learning_paths (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT,
-                path_data TEXT,
-                created_by_agent TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # Learning progress table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS learning_progress (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT,
-                module_id TEXT,
-                step_number INTEGER,
-                score INTEGER,
-                completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # Agent communications table (for A2A handoffs)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS agent_communications (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT,
-                from_agent TEXT,
-                to_agent TEXT,
-                message_data TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
-        print(f"✅ Database initialized: {self.db_path}")
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            
+            # Users table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS users (
+                    id TEXT PRIMARY KEY,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # ADK Sessions table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS adk_sessions (
+                    session_id TEXT PRIMARY KEY,
+                    user_id TEXT,
+                    data TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Financial assessments table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS assessments (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT,
+                    topic TEXT,
+                    user_response TEXT,
+                    knowledge_level TEXT,
+                    risk_tolerance TEXT,
+                    learning_style TEXT,
+                    confidence_score REAL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES users (id)
+                )
+            ''')
+            
+            # Learning paths table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS learning_paths (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT,
+                    path_data TEXT,
+                    created_by_agent TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES users (id)
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_learning_paths_user
+                ON learning_paths (user_id, id)
+            ''')
+            
+            # Learning progress table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS learning_progress (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT,
+                    module_id TEXT,
+                    step_number INTEGER,
+                    score INTEGER,
+                    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES users (id)
+                )
+            ''')
+            
+            # Agent communications table (for A2A handoffs)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS agent_communications (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT,
+                    from_agent TEXT,
+                    to_agent TEXT,
+                    message_data TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            print(f"✅ Database initialized: {self.db_path}")
     
     # User management
     def create_user(self, user_id: str) -> bool:
         """Create a new user if they don't exist"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('INSERT OR IGNORE INTO users (id) VALUES (?)', (user_id,))
-            conn.commit()
-            conn.close()
-            return True
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('INSERT OR IGNORE INTO users (id) VALUES (?)', (user_id,))
+                return True
         except Exception as e:
             print(f"Error creating user: {e}")
             return False
@@ -119,16 +187,15 @@ class DatabaseService:
         try:
             self.create_user(user_id)
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO assessments 
-                (user_id, topic, user_response, knowledge_level, risk_tolerance, learning_style, confidence_score)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (user_id, topic, user_response, knowledge_level, risk_tolerance, learning_style, confidence_score))
-            conn.commit()
-            conn.close()
-            return True
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO assessments 
+                    (user_id, topic, user_response, knowledge_level, risk_tolerance, learning_style, confidence_score)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (user_id, topic, user_response, knowledge_level, risk_tolerance, learning_style, confidence_score))
+                self._stats_changed()
+                return True
         except Exception as e:
             print(f"Error saving assessment: {e}")
             return False
@@ -136,17 +203,16 @@ class DatabaseService:
     def get_user_assessments(self, user_id: str) -> List[Tuple]:
         """Get all assessments for a user"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT topic, knowledge_level, risk_tolerance, learning_style, confidence_score, created_at
-                FROM assessments
-                WHERE user_id = ?
-                ORDER BY created_at DESC
-            ''', (user_id,))
-            results = cursor.fetchall()
-            conn.close()
-            return results
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT topic, knowledge_level, risk_tolerance, learning_style, confidence_score, created_at
+                    FROM assessments
+                    WHERE user_id = ?
+                    ORDER BY created_at DESC
+                ''', (user_id,))
+                results = cursor.fetchall()
+                return results
         except Exception as e:
             print(f"Error getting assessments: {e}")
             return []
@@ -154,17 +220,16 @@ class DatabaseService:
     def get_topic_assessment(self, user_id: str, topic: str) -> Optional[Tuple]:
         """Get specific topic assessment for user"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT knowledge_level, risk_tolerance, learning_style, confidence_score, created_at
-                FROM assessments
-                WHERE user_id = ? AND topic = ?
-                ORDER BY created_at DESC LIMIT 1
-            ''', (user_id, topic))
-            result = cursor.fetchone()
-            conn.close()
-            return result
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT knowledge_level, risk_tolerance, learning_style, confidence_score, created_at
+                    FROM assessments
+                    WHERE user_id = ? AND topic = ?
+                    ORDER BY created_at DESC LIMIT 1
+                ''', (user_id, topic))
+                result = cursor.fetchone()
+                return result
         except Exception as e:
             print(f"Error getting topic assessment: {e}")
             return None
@@ -175,40 +240,69 @@ class DatabaseService:
         try:
             self.create_user(user_id)
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO learning_paths (user_id, path_data, created_by_agent)
-                VALUES (?, ?, ?)
-            ''', (user_id, json.dumps(path_data), created_by_agent))
-            conn.commit()
-            conn.close()
-            return True
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO learning_paths (user_id, path_data, created_by_agent)
+                    VALUES (?, ?, ?)
+                ''', (user_id, dumps(path_data), created_by_agent))
+                self._cache_learning_path(user_id, None)
+                self._stats_changed()
+                return True
         except Exception as e:
             print(f"Error saving learning path: {e}")
             return False
     
-    def get_user_learning_path(self, user_id: str) -> Optional[Dict[str, Any]]:
-        """Get the latest learning path for a user"""
+    def _cache_learning_path(self, user_id: str, learning_path: Optional[Dict[str, Any]]):
+        """Remember a freshly read learning path, or forget the user's entry when there is none"""
+        with self._cache_lock:
+            if learning_path is None:
+                self._path_cache.pop(user_id, None)
+            else:
+                self._path_cache[user_id] = learning_path
+    
+    def _latest_learning_path_id(self, user_id: str) -> Optional[int]:
+        """Get the id of the user's newest learning path, or None if they have none"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT path_data, created_by_agent, created_at
-                FROM learning_paths
-                WHERE user_id = ?
-                ORDER BY created_at DESC LIMIT 1
-            ''', (user_id,))
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result:
-                return {
-                    "path_data": json.loads(result[0]),
-                    "created_by_agent": result[1],
-                    "created_at": result[2]
-                }
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT MAX(id) FROM learning_paths WHERE user_id = ?', (user_id,))
+                return cursor.fetchone()[0]
+        except Exception as e:
+            print(f"Error getting latest learning path id: {e}")
             return None
+    
+    def get_cached_learning_path(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get the user's learning path, reusing the cached copy while no newer path has been saved"""
+        with self._cache_lock:
+            learning_path = self._path_cache.get(user_id)
+        if learning_path is not None and learning_path["id"] == self._latest_learning_path_id(user_id):
+            return learning_path
+        return self.get_user_learning_path(user_id)
+    
+    def get_user_learning_path(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get the latest learning path for a user, or None if they have none"""
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT id, path_data, created_by_agent, created_at
+                    FROM learning_paths
+                    WHERE user_id = ?
+                    ORDER BY created_at DESC, id DESC LIMIT 1
+                ''', (user_id,))
+                result = cursor.fetchone()
+                
+                learning_path = None
+                if result:
+                    learning_path = {
+                        "id": result[0],
+                        "path_data": loads(result[1]),
+                        "created_by_agent": result[2],
+                        "created_at": result[3]
+                    }
+                self._cache_learning_path(user_id, learning_path)
+                return learning_path
         except Exception as e:
             print(f"Error getting learning path: {e}")
             return None
@@ -219,34 +313,33 @@ class DatabaseService:
         try:
             self.create_user(user_id)
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self._connection() as conn:
+                cursor = conn.cursor()
 
-            # Check if a progress entry already exists for this user and module
-            cursor.execute('''
-                SELECT id FROM learning_progress
-                WHERE user_id = ? AND module_id = ?
-            ''', (user_id, module_id))
-            result = cursor.fetchone()
-
-            if result:
-                # Update existing progress
-                cursor.execute('''
-                    UPDATE learning_progress
-                    SET step_number = ?, score = ?, completed_at = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                ''', (step_number, score, result[0]))
-            else:
-                # Insert new progress entry
+                # Check if a progress entry already exists for this user and module
                 cursor.execute('''
-                    INSERT INTO learning_progress 
-                    (user_id, module_id, step_number, score)
-                    VALUES (?, ?, ?, ?)
-                ''', (user_id, module_id, step_number, score))
-                
-            conn.commit()
-            conn.close()
-            return True
+                    SELECT id FROM learning_progress
+                    WHERE user_id = ? AND module_id = ?
+                ''', (user_id, module_id))
+                result = cursor.fetchone()
+
+                if result:
+                    # Update existing progress
+                    cursor.execute('''
+                        UPDATE learning_progress
+                        SET step_number = ?, score = ?, completed_at = CURRENT_TIMESTAMP
+                        WHERE id = ?
+                    ''', (step_number, score, result[0]))
+                else:
+                    # Insert new progress entry
+                    cursor.execute('''
+                        INSERT INTO learning_progress 
+                        (user_id, module_id, step_number, score)
+                        VALUES (?, ?, ?, ?)
+                    ''', (user_id, module_id, step_number, score))
+                    
+                self._stats_changed()
+                return True
         except Exception as e:
             print(f"Error saving progress: {e}")
             return False
@@ -254,102 +347,187 @@ class DatabaseService:
     def get_user_progress(self, user_id: str) -> List[Tuple]:
         """Get user's learning progress"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT module_id, step_number, score, completed_at
-                FROM learning_progress
-                WHERE user_id = ?
-                ORDER BY completed_at DESC
-            ''', (user_id,))
-            results = cursor.fetchall()
-            conn.close()
-            return results
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT module_id, step_number, score, completed_at
+                    FROM learning_progress
+                    WHERE user_id = ?
+                    ORDER BY completed_at DESC
+                ''', (user_id,))
+                results = cursor.fetchall()
+                return results
         except Exception as e:
             print(f"Error getting progress: {e}")
             return []
     
+    def get_module_progress(self, user_id: str) -> Dict[str, int]:
+        """Get the furthest step reached in each module, keyed by module id"""
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT module_id, MAX(step_number)
+                    FROM learning_progress
+                    WHERE user_id = ?
+                    GROUP BY module_id
+                ''', (user_id,))
+                results = dict(cursor.fetchall())
+                return results
+        except Exception as e:
+            print(f"Error getting module progress: {e}")
+            return {}
+    
+    def get_user_state(self, user_id: str) -> Tuple[Optional[Dict[str, Any]], List[Tuple]]:
+        """Get the user's latest learning path (or None) and learning progress over one connection"""
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT id, path_data, created_by_agent, created_at
+                    FROM learning_paths
+                    WHERE user_id = ?
+                    ORDER BY created_at DESC, id DESC LIMIT 1
+                ''', (user_id,))
+                result = cursor.fetchone()
+                cursor.execute('''
+                    SELECT module_id, step_number, score, completed_at
+                    FROM learning_progress
+                    WHERE user_id = ?
+                    ORDER BY completed_at DESC
+                ''', (user_id,))
+                progress = cursor.fetchall()
+
+                learning_path = None
+                if result:
+                    learning_path = {
+                        "id": result[0],
+                        "path_data": loads(result[1]),
+                        "created_by_agent": result[2],
+                        "created_at": result[3]
+                    }
+                self._cache_learning_path(user_id, learning_path)
+                return learning_path, progress
+        except Exception as e:
+            print(f"Error getting user state: {e}")
+            return None, []
+
     # Agent communication methods (for A2A handoffs)
     def save_agent_communication(self, user_id: str, from_agent: str, to_agent: str, message_data: Dict[str, Any]) -> bool:
         """Save agent-to-agent communication"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO agent_communications (user_id, from_agent, to_agent, message_data)
-                VALUES (?, ?, ?, ?)
-            ''', (user_id, from_agent, to_agent, json.dumps(message_data)))
-            conn.commit()
-            conn.close()
-            return True
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO agent_communications (user_id, from_agent, to_agent, message_data)
+                    VALUES (?, ?, ?, ?)
+                ''', (user_id, from_agent, to_agent, dumps(message_data)))
+                self._stats_changed()
+                return True
         except Exception as e:
             print(f"Error saving agent communication: {e}")
             return False
     
     def get_latest_handoff(self, user_id: str, to_agent: str) -> Optional[Dict[str, Any]]:
-        """Get the latest handoff message to a specific agent"""
+        """Get the latest handoff message to a specific agent, or None if there is none"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT from_agent, message_data, created_at
-                FROM agent_communications
-                WHERE user_id = ? AND to_agent = ?
-                ORDER BY created_at DESC LIMIT 1
-            ''', (user_id, to_agent))
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result:
-                return {
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT from_agent, message_data, created_at
+                    FROM agent_communications
+                    WHERE user_id = ? AND to_agent = ?
+                    ORDER BY created_at DESC LIMIT 1
+                ''', (user_id, to_agent))
+                result = cursor.fetchone()
+                
+                if result:
+                    return {
+                        "from_agent": result[0],
+                        "message_data": loads(result[1]),
+                        "created_at": result[2]
+                    }
+                return None
+        except Exception as e:
+            print(f"Error getting handoff: {e}")
+            return None
+    
+    def get_handoff_with_context(self, user_id: str, to_agent: str) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """Get the latest handoff to an agent together with the user's latest learning path (None for either that is missing)"""
+        try:
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT ac.from_agent, ac.message_data, ac.created_at,
+                           lp.id, lp.path_data, lp.created_by_agent, lp.created_at
+                    FROM (
+                        SELECT from_agent, message_data, created_at
+                        FROM agent_communications
+                        WHERE user_id = ? AND to_agent = ?
+                        ORDER BY created_at DESC LIMIT 1
+                    ) AS ac
+                    LEFT JOIN (
+                        SELECT id, path_data, created_by_agent, created_at
+                        FROM learning_paths
+                        WHERE user_id = ?
+                        ORDER BY created_at DESC, id DESC LIMIT 1
+                    ) AS lp ON 1 = 1
+                ''', (user_id, to_agent, user_id))
+                result = cursor.fetchone()
+                
+                if not result:
+                    return None, None
+                
+                handoff = {
                     "from_agent": result[0],
-                    "message_data": json.loads(result[1]),
+                    "message_data": loads(result[1]),
                     "created_at": result[2]
                 }
-            return None
+                learning_path = None
+                if result[3] is not None:
+                    learning_path = {
+                        "id": result[3],
+                        "path_data": loads(result[4]),
+                        "created_by_agent": result[5],
+                        "created_at": result[6]
+                    }
+                return handoff, learning_path
         except Exception as e:
-            print(f"Error getting handoff: {e}")
-            return None
+            print(f"Error getting handoff with context: {e}")
+            return None, None
     
     # Statistics and debugging
     def get_database_stats(self) -> Dict[str, int]:
         """Get database statistics"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Count assessments
-            cursor.execute('SELECT COUNT(*) FROM assessments')
-            assessment_count = cursor.fetchone()[0]
-            
-            # Count unique users
-            cursor.execute('SELECT COUNT(*) FROM users')
-            user_count = cursor.fetchone()[0]
-            
-            # Count learning paths
-            cursor.execute('SELECT COUNT(*) FROM learning_paths')
-            path_count = cursor.fetchone()[0]
-            
-            # Count progress entries
-            cursor.execute('SELECT COUNT(*) FROM learning_progress')
-            progress_count = cursor.fetchone()[0]
-            
-            # Count agent communications
-            cursor.execute('SELECT COUNT(*) FROM agent_communications')
-            comm_count = cursor.fetchone()[0]
-            
-            conn.close()
-            
-            return {
-                'total_users': user_count,
-                'total_assessments': assessment_count,
-                'total_learning_paths': path_count,
-                'total_progress_entries': progress_count,
-                'total_agent_communications': comm_count
-            }
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                # All five counts in one statement, so one round trip through the statement cache
+                cursor.execute('''
+                    SELECT
+                        (SELECT COUNT(*) FROM assessments),
+                        (SELECT COUNT(*) FROM users),
+                        (SELECT COUNT(*) FROM learning_paths),
+                        (SELECT COUNT(*) FROM learning_progress),
+                        (SELECT COUNT(*) FROM agent_communications)
+                ''')
+                assessment_count, user_count, path_count, progress_count, comm_count = cursor.fetchone()
+                
+                return {
+                    'total_users': user_count,
+                    'total_assessments': assessment_count,
+                    'total_learning_paths': path_count,
+                    'total_progress_entries': progress_count,
+                    'total_agent_communications': comm_count
+                }
         except Exception as e:
             print(f"Error getting stats: {e}")
             return {}
+    
+    def get_cached_database_stats(self) -> Dict[str, int]:
+        """Get database statistics, reusing a read from the last minute"""
+        return self._cached_read(self._stats_cache, None, lambda _: self.get_database_stats())
 
 # Global database instance
 db = DatabaseService()
\ No newline at end of file
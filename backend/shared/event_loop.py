@@ -0,0 +1,15 @@
+# event_loop.py
+import asyncio
+import threading
+
+# The ADK's session methods are asynchronous, but Flask routes are synchronous.
+# One event loop runs on a background thread for the life of the process so
+# requests reuse it instead of creating and tearing down a loop per call.
+LOOP = asyncio.new_event_loop()
+_LOOP_THREAD = threading.Thread(target=LOOP.run_forever, name="adk-event-loop", daemon=True)
+_LOOP_THREAD.start()
+
+
+def run_async(coro):
+    """Run a coroutine on the shared event loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, LOOP).result()
@@ -0,0 +1,29 @@
+# json_utils.py
+import dataclasses
+
+try:
+    import orjson
+except ImportError:  # orjson is in requirements.txt, but keep the tools usable without it
+    orjson = None
+    import json
+
+
+def _encode_dataclass(obj):
+    """Let the stdlib encoder handle the dataclasses orjson serializes natively"""
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj) -> str:
+    """Serialize a tool response to a JSON string with orjson, or the stdlib json module without it"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, default=_encode_dataclass)
+
+
+def loads(data):
+    """Parse JSON text or bytes with orjson, or the stdlib json module without it"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
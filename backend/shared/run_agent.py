@@ -0,0 +1,86 @@
+# run_agent.py
+import logging
+import sys
+
+from flask import Response, request, jsonify, stream_with_context
+from google.genai import types
+
+from shared.sessions import ensure_session
+
+logger = logging.getLogger(__name__)
+
+# Last chunk of a /run/stream reply whose run failed after the 200 was already sent
+_STREAM_ERROR_MARKER = "\n[error] An internal server error occurred while generating the response."
+
+
+def iter_response_text(runner, user_id: str, session_id: str, message: str):
+    """Run the agent on a user message and yield its text as each event arrives"""
+    content = types.Content(role='user', parts=[types.Part(text=message)])
+
+    for event in runner.run(user_id=user_id, session_id=session_id, new_message=content):
+        if event.content and event.content.parts and event.content.parts[0].text:
+            yield event.content.parts[0].text
+
+
+def _iter_stream_text(runner, user_id: str, session_id: str, message: str):
+    """Yield the agent's text for /run/stream, ending with an error marker if the run fails midway"""
+    try:
+        yield from iter_response_text(runner, user_id, session_id, message)
+    except Exception:
+        logger.exception("An error occurred during streamed agent run")
+        yield _STREAM_ERROR_MARKER
+
+
+def _parse_run_payload():
+    """Return (user_id, message) from a /run request body, or None if it is invalid"""
+    # Parse the body once; a missing or malformed body is a bad request, not a 500
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return None
+
+    user_id = data.get("userId")
+    message_data = data.get("newMessage", {})
+    message = message_data.get("text") if isinstance(message_data, dict) else None
+
+    if not user_id or not message or not isinstance(user_id, str):
+        logger.debug("Validation failed: 'userId' or 'newMessage.text' key is missing or invalid in payload.")
+        return None
+    # The user id doubles as the session id; interning lets every session key,
+    # cache entry and bind parameter for this user share one string object
+    return sys.intern(user_id), message
+
+
+def handle_run(runner):
+    """Handle a /run request: run the agent and return its full reply as JSON"""
+    payload = _parse_run_payload()
+    if payload is None:
+        return jsonify({"error": "Invalid request payload"}), 400
+    user_id, message = payload
+
+    try:
+        session_id = ensure_session(runner, user_id, user_id)
+        response_text = "".join(iter_response_text(runner, user_id, session_id, message))
+        return jsonify({"response": response_text})
+    except Exception as e:
+        logger.error("An error occurred during agent run: %s", e)
+        return jsonify({"response": f"An internal server error occurred: {e}"}), 500
+
+
+def handle_run_stream(runner):
+    """Handle a /run/stream request: stream the agent's reply as plain text"""
+    payload = _parse_run_payload()
+    if payload is None:
+        return jsonify({"error": "Invalid request payload"}), 400
+    user_id, message = payload
+
+    try:
+        session_id = ensure_session(runner, user_id, user_id)
+    except Exception as e:
+        logger.error("An error occurred during agent run: %s", e)
+        return jsonify({"response": f"An internal server error occurred: {e}"}), 500
+
+    # Send text as the model produces it instead of buffering the whole reply
+    return Response(
+        stream_with_context(_iter_stream_text(runner, user_id, session_id, message)),
+        mimetype="text/plain"
+    )
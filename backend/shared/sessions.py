@@ -0,0 +1,119 @@
+# sessions.py
+import logging
+import threading
+
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.sessions import DatabaseSessionService
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from config import SQLITE_PRAGMAS, USER_SESSIONS_DB_URL
+from shared.event_loop import run_async
+
+logger = logging.getLogger(__name__)
+
+# SQLite allows a single writer at a time, so writes share one connection
+# while lookups draw from a separate pool and proceed alongside it under WAL.
+_READER_POOL_SIZE = 8
+_CONNECT_ARGS = {"check_same_thread": False, "timeout": 5}
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Configure every new pooled connection to the session database"""
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def _disable_driver_transactions(dbapi_connection, connection_record):
+    """Let SQLAlchemy emit BEGIN itself instead of the sqlite3 driver"""
+    dbapi_connection.isolation_level = None
+
+
+def _begin_immediate(conn):
+    """Take the write lock when the transaction starts rather than on first write"""
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def _sync_engine(service: DatabaseSessionService):
+    # Async engines expose the pool events on their sync_engine
+    return getattr(service.db_engine, "sync_engine", service.db_engine)
+
+
+class ReadWriteSessionService(DatabaseSessionService):
+    """Session service with a single-connection writer pool and a separate reader pool"""
+
+    def __init__(self, db_url: str):
+        super().__init__(db_url=db_url, connect_args=_CONNECT_ARGS, pool_size=1, max_overflow=0)
+        writer = _sync_engine(self)
+        event.listen(writer, "connect", _apply_sqlite_pragmas)
+        event.listen(writer, "connect", _disable_driver_transactions)
+        event.listen(writer, "begin", _begin_immediate)
+
+        self._reader = DatabaseSessionService(
+            db_url=db_url, connect_args=_CONNECT_ARGS, pool_size=_READER_POOL_SIZE
+        )
+        event.listen(_sync_engine(self._reader), "connect", _apply_sqlite_pragmas)
+
+    async def prepare_tables(self):
+        await super().prepare_tables()
+        await self._reader.prepare_tables()
+
+    async def get_session(self, **kwargs):
+        return await self._reader.get_session(**kwargs)
+
+    async def list_sessions(self, **kwargs):
+        return await self._reader.list_sessions(**kwargs)
+
+
+def create_session_service() -> DatabaseSessionService:
+    """Build the session service used by the agent runners"""
+    return ReadWriteSessionService(USER_SESSIONS_DB_URL)
+
+
+# One session service (and connection pool) shared by every agent in the process
+session_service = create_session_service()
+
+
+def warm_up_session_store():
+    """Open both pools and check the schema before the first request arrives"""
+    try:
+        run_async(session_service.prepare_tables())
+    except Exception as e:
+        logger.warning("Session store warm-up failed: %s", e)
+
+
+# (app_name, user_id, session_id) triples already known to exist in the session store.
+# Sessions are never deleted by the agents, so once seen they can skip the lookup.
+# The lock only guards the set; the store round-trips run outside it, so one user's
+# first request never waits on another's.
+_KNOWN_SESSIONS = set()
+_KNOWN_SESSIONS_LOCK = threading.Lock()
+
+
+def ensure_session(runner, user_id: str, session_id: str) -> str:
+    """Make sure an ADK session exists for the user and return its id"""
+    key = (runner.app_name, user_id, session_id)
+    with _KNOWN_SESSIONS_LOCK:
+        if key in _KNOWN_SESSIONS:
+            return session_id
+
+    existing_session = run_async(runner.session_service.get_session(
+        app_name=runner.app_name, user_id=user_id, session_id=session_id
+    ))
+
+    if existing_session is None:
+        logger.debug("No session found for user '%s'. Creating a new one.", user_id)
+        try:
+            new_session = run_async(runner.session_service.create_session(
+                app_name=runner.app_name, user_id=user_id, session_id=session_id
+            ))
+            session_id = new_session.id
+        except (AlreadyExistsError, IntegrityError):
+            # A concurrent request for the same user created it first, which is just as good
+            logger.debug("Session for user '%s' was created concurrently.", user_id)
+
+    with _KNOWN_SESSIONS_LOCK:
+        _KNOWN_SESSIONS.add(key)
+    return session_id
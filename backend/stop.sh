@@ -1,6 +1,6 @@
 #!/bin/bash
 
-# This script stops the Flask agent servers running on ports 8000-8003.
+# This script stops the Flask agent servers running on ports 8000-8003 and the CORS proxy on 5001.
 
 echo "Shutting down all agent servers..."
 
@@ -9,5 +9,6 @@ kill $(lsof -t -i:8000) 2>/dev/null && echo "Stopped Assessment Agent on port 80
 kill $(lsof -t -i:8001) 2>/dev/null && echo "Stopped Planning Agent on port 8001."
 kill $(lsof -t -i:8002) 2>/dev/null && echo "Stopped Progress Agent on port 8002."
 kill $(lsof -t -i:8003) 2>/dev/null && echo "Stopped Content Delivery Agent on port 8003."
+kill $(lsof -t -i:5001) 2>/dev/null && echo "Stopped CORS proxy on port 5001."
 
 echo "All agent servers have been stopped."